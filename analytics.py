@@ -0,0 +1,240 @@
+import argparse
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from db_access import get_read_pool
+
+#### LOADING STORED BARS AS A PANEL: ####
+
+def load_panel(conn, provider=None, start_date=None, fields=("close", "high", "low")):
+    """
+    Loads stored bars for every symbol into 2-D arrays of shape (symbols, dates).
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    provider (str, optional): A provider name to read from 'daily_bars'. None reads 'weekly_data'.
+    start_date (str, optional): Only bars on or after this "YYYY-MM-DD" date.
+    fields (tuple): Columns to load. Default is close, high and low.
+
+    What the code does:
+    - Reads all matching rows with one query.
+    - Maps symbols and dates to row and column numbers with np.unique.
+    - Scatters every field into a NaN-padded matrix in one assignment.
+
+    Returns:
+    tuple: (symbols, dates, panel) where panel maps each field to a float64 matrix.
+    """
+    columns = ", ".join(fields)
+    params = []
+    if provider is None:
+        sql = f"SELECT stocks.symbol, date, {columns} FROM weekly_data JOIN stocks ON weekly_data.stock_id = stocks.id"
+        where = []
+    else:
+        sql = f"""
+            SELECT stocks.symbol, date, {columns}
+            FROM daily_bars
+            JOIN stocks ON daily_bars.stock_id = stocks.id
+            JOIN providers ON daily_bars.provider_id = providers.id
+        """
+        where = ["providers.name = ?"]
+        params.append(provider)
+    if start_date is not None:
+        where.append("date >= ?")
+        params.append(start_date)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return np.array([], dtype=object), np.array([], dtype=object), {f: np.empty((0, 0)) for f in fields}
+
+    symbol_col, date_col, *value_cols = zip(*rows)
+    symbols, sym_idx = np.unique(np.array(symbol_col, dtype=object), return_inverse=True)
+    dates, date_idx = np.unique(np.array(date_col, dtype=object), return_inverse=True)
+    panel = {}
+    for field, values in zip(fields, value_cols):
+        matrix = np.full((len(symbols), len(dates)), np.nan)
+        matrix[sym_idx, date_idx] = np.array(values, dtype="float64")
+        panel[field] = matrix
+    return symbols, dates, panel
+
+def panel_from_store(store, start_date=None, fields=("close", "high", "low")):
+    """
+    Builds the same (symbols, dates, panel) result as load_panel from a BarStore, e.g. one
+    opened from a snapshot with snapshot.load_snapshot, without querying SQLite.
+    """
+    start = None if start_date is None else np.datetime64(start_date, "D").astype("int64")
+    keep = slice(None) if start is None else store.dates >= start
+    days = np.asarray(store.dates[keep])
+    lengths = np.diff(store.offsets)
+    sym_idx = np.repeat(np.arange(len(store.symbols)), lengths)[keep]
+    day_values, date_idx = np.unique(days, return_inverse=True)
+    symbols = np.array(store.symbols, dtype=object)
+    dates = day_values.astype("datetime64[D]").astype(str).astype(object)
+    panel = {}
+    for field in fields:
+        matrix = np.full((len(symbols), len(dates)), np.nan)
+        matrix[sym_idx, date_idx] = store.columns[field][keep]
+        panel[field] = matrix
+    return symbols, dates, panel
+
+#### WINDOWED STATISTICS: ####
+
+def log_returns(close):
+    """
+    Returns log(close[t] / close[t-1]) along the date axis. The first column is NaN.
+    """
+    returns = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = np.diff(np.log(close), axis=1)
+    return returns
+
+def rolling_std(values, window):
+    """
+    Rolling sample standard deviation along the date axis.
+
+    Parameters:
+    values (ndarray): A (symbols, dates) matrix.
+    window (int): Number of observations per window.
+
+    What the code does:
+    - Builds a strided (symbols, dates - window + 1, window) view without copying.
+    - Takes the standard deviation of every window at once. Any window containing a
+      missing value yields NaN.
+
+    Returns:
+    ndarray: A matrix of the same shape as `values`, NaN for the first window - 1 columns.
+    """
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] < window:
+        return out
+    windows = sliding_window_view(values, window, axis=1)
+    out[:, window - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+def high_low_range(high, low, close):
+    """
+    Returns each bar's high-low range as a fraction of its close.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (high - low) / close
+
+def _last_valid(matrix):
+    # The right-most non-NaN value of each row, NaN when the row is empty
+    if matrix.shape[1] == 0:
+        return np.full(matrix.shape[0], np.nan)
+    valid = ~np.isnan(matrix)
+    has_any = valid.any(axis=1)
+    last = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    result = np.full(matrix.shape[0], np.nan)
+    result[has_any] = matrix[has_any, last[has_any]]
+    return result
+
+def _compact(matrix):
+    # Shift each row's values to the right, dropping gaps, so windows cover the latest
+    # observations of that symbol even when symbols trade on different dates
+    order = np.argsort(~np.isnan(matrix), axis=1, kind="stable")
+    return np.take_along_axis(matrix, order, axis=1)
+
+def provider_spread(conn, providers, start_date=None):
+    """
+    Measures how much providers disagree on each symbol's close.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    providers (list): Provider names with daily bars stored.
+    start_date (str, optional): Only bars on or after this date.
+
+    What the code does:
+    - Loads each provider's close panel and aligns them on the union of symbols and dates.
+    - Computes (max - min) / mean across providers for every symbol and date.
+      Dates fewer than two providers have a close for are NaN.
+
+    Returns:
+    DataFrame: Spread indexed by symbol with one column per date.
+    """
+    panels = [load_panel(conn, p, start_date, fields=("close",)) for p in providers]
+    symbols = np.unique(np.concatenate([p[0] for p in panels])) if panels else np.array([])
+    dates = np.unique(np.concatenate([p[1] for p in panels])) if panels else np.array([])
+    cube = np.full((len(panels), len(symbols), len(dates)), np.nan)
+    for i, (p_symbols, p_dates, panel) in enumerate(panels):
+        if len(p_symbols) == 0:
+            continue
+        rows = np.searchsorted(symbols, p_symbols)
+        cols = np.searchsorted(dates, p_dates)
+        cube[i][np.ix_(rows, cols)] = panel["close"]
+    # nanmax/nanmean warn on all-NaN slices, which are expected for dates a symbol never traded
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spread = (np.nanmax(cube, axis=0) - np.nanmin(cube, axis=0)) / np.nanmean(cube, axis=0)
+    # One provider cannot disagree with itself; its lone close would read as a spread of 0
+    spread[(~np.isnan(cube)).sum(axis=0) < 2] = np.nan
+    return pd.DataFrame(spread, index=pd.Index(symbols, name="symbol"), columns=dates)
+
+def _screen(symbols, dates, panel, window):
+    # The per-symbol statistics of volatility_screen for one loaded panel
+    # Returns are taken between a symbol's consecutive observations, so a date it did not
+    # trade neither drops a return nor shifts its window away from close_std's
+    close = _compact(panel["close"])
+    returns = log_returns(close)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        hl_range = np.nanmean(high_low_range(panel["high"], panel["low"], panel["close"]), axis=1)
+    return pd.DataFrame({
+        "close_std": _last_valid(rolling_std(close, window)),
+        "return_std": _last_valid(rolling_std(returns, window)),
+        "hl_range": hl_range,
+    }, index=pd.Index(symbols, name="symbol"))
+
+def volatility_screen(conn=None, provider=None, window=6, horizon_days=90, spread_providers=None, snapshot=None):
+    """
+    Computes volatility statistics for every stored symbol in one batched pass.
+
+    Parameters:
+    conn (sqlite3.Connection, optional): An open connection. Default borrows one from DB_NAME's read pool.
+    provider (str, optional): Daily provider to read. None uses the weekly Alpha Vantage data.
+    window (int): Observations per rolling window. Default is 6, as in the volatility chart.
+    horizon_days (int): How many days of history to load. Default is 90.
+    spread_providers (list, optional): Providers to compare for the disagreement spread.
+    snapshot (str, optional): A bar snapshot file to read instead of the database.
+        spread_providers is ignored then.
+
+    What the code does:
+    - Loads the horizon into (symbols, dates) matrices with load_panel, or with
+      panel_from_store from a memory-mapped snapshot.
+    - Computes rolling close std, rolling log-return std and the mean high-low range with
+      vectorized NumPy operations across all symbols at once.
+    - Optionally adds the latest cross-provider spread.
+
+    Returns:
+    DataFrame: One row per symbol with close_std, return_std, hl_range and optionally spread.
+    """
+    if snapshot is not None:
+        from snapshot import load_snapshot
+        name = provider or "weekly"
+        store = load_snapshot(snapshot, [name])[name]
+        start_date = (datetime.now() - timedelta(days=horizon_days)).strftime('%Y-%m-%d')
+        return _screen(*panel_from_store(store, start_date), window)
+
+    if conn is None:
+        with get_read_pool().connection() as conn:
+            return volatility_screen(conn, provider, window, horizon_days, spread_providers)
+
+    start_date = (datetime.now() - timedelta(days=horizon_days)).strftime('%Y-%m-%d')
+    result = _screen(*load_panel(conn, provider, start_date), window)
+    if spread_providers:
+        spread = provider_spread(conn, spread_providers, start_date)
+        result["spread"] = pd.Series(_last_valid(spread.to_numpy()), index=spread.index)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank stored symbols by recent volatility")
+    parser.add_argument("--provider", default=None, help="daily provider to read; default is the weekly data")
+    parser.add_argument("--snapshot", default=None, help="read a bar snapshot file instead of the database")
+    args = parser.parse_args()
+    screen = volatility_screen(provider=args.provider, snapshot=args.snapshot)
+    print(screen.sort_values("close_std", ascending=False).to_string())
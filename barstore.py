@@ -0,0 +1,261 @@
+import json
+import os
+
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+#### COLUMNAR BAR STORAGE: ####
+
+# Price and volume columns, all float64. Dates are int64 days since 1970-01-01.
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+def to_days(dates):
+    """
+    Converts "YYYY-MM-DD" strings, datetimes or datetime64 values to int64 epoch days.
+    """
+    return np.asarray(dates, dtype="datetime64[D]").astype("int64")
+
+def _day(value):
+    # A single date bound as epoch days, or None
+    return None if value is None else int(to_days([value])[0])
+
+class BarSeries:
+    """
+    The bars of one symbol as parallel NumPy columns, sorted by date.
+    The columns are usually views into a BarStore, so a BarSeries costs no copy.
+    """
+
+    def __init__(self, symbol, dates, columns):
+        self.symbol = symbol
+        self.dates = dates
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getattr__(self, name):
+        # series.close, series.high, ... return the column
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def index(self):
+        """The dates as datetime64[D], viewing the same memory."""
+        return self.dates.view("datetime64[D]")
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Returns the bars from start_date to end_date inclusive, found with a binary search.
+        The result shares memory with this series.
+        """
+        lo = 0 if start_date is None else np.searchsorted(self.dates, _day(start_date), side="left")
+        hi = len(self.dates) if end_date is None else np.searchsorted(self.dates, _day(end_date), side="right")
+        return BarSeries(self.symbol, self.dates[lo:hi], {f: c[lo:hi] for f, c in self.columns.items()})
+
+    def to_frame(self):
+        """
+        Returns the bars as an OHLCV DataFrame in the shape normalize.py produces.
+        """
+        index = pd.DatetimeIndex(self.index.astype("datetime64[ns]"), name="date")
+        return pd.DataFrame({f: np.asarray(self.columns[f]) for f in FIELDS}, index=index)
+
+class BarStore:
+    """
+    Bars of many symbols packed into one contiguous array per column.
+
+    Each symbol's bars sit in one run of rows, sorted by date, and `index` maps the symbol to
+    that run's slice. Looking up a symbol or cutting it to a date range returns views, never copies.
+    Compared with a DataFrame per symbol, a bar costs 48 bytes and there is no per-symbol overhead
+    beyond one slice.
+
+        store = BarStore.from_sqlite(conn, provider="polygon")
+        recent = store["AAPL"].between("2024-01-01")
+        store.save("bars/polygon")
+        store = BarStore.load("bars/polygon")  # memory-mapped
+    """
+
+    def __init__(self, symbols, offsets, dates, columns):
+        self.symbols = list(symbols)
+        self.offsets = offsets
+        self.dates = dates
+        self.columns = columns
+        self.index = {
+            s: slice(int(offsets[i]), int(offsets[i + 1])) for i, s in enumerate(self.symbols)
+        }
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __getitem__(self, symbol):
+        rows = self.index[symbol]
+        return BarSeries(symbol, self.dates[rows], {f: c[rows] for f, c in self.columns.items()})
+
+    def get(self, symbol, default=None):
+        return self[symbol] if symbol in self.index else default
+
+    @property
+    def nbytes(self):
+        """Bytes held by the date and value columns."""
+        return self.dates.nbytes + sum(c.nbytes for c in self.columns.values())
+
+    #### BUILDING: ####
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.zeros(1, dtype="int64"), np.empty(0, dtype="int64"),
+                   {f: np.empty(0, dtype="float64") for f in FIELDS})
+
+    @classmethod
+    def from_rows(cls, rows, count=None):
+        """
+        Packs (symbol, date, open, high, low, close, volume) rows into a store.
+
+        Parameters:
+        rows (iterable): Rows grouped by symbol and sorted by date within each symbol,
+            e.g. a cursor over a query ending in ORDER BY symbol, date.
+        count (int, optional): The number of rows, if known. The columns are then allocated once
+            and filled in place, so the rows are never all held as Python objects at the same time.
+
+        Returns:
+        BarStore: The packed bars.
+        """
+        if count is None:
+            rows = list(rows)
+            count = len(rows)
+        dates = np.empty(count, dtype="int64")
+        values = np.empty((len(FIELDS), count), dtype="float64")
+        symbols = []
+        starts = []
+        block = []
+        filled = 0
+
+        def flush():
+            nonlocal filled
+            if not block:
+                return
+            _, block_dates, *block_values = zip(*block)
+            end = filled + len(block)
+            dates[filled:end] = to_days(block_dates)
+            values[:, filled:end] = np.array(block_values, dtype="float64")
+            filled = end
+            block.clear()
+
+        for row in rows:
+            if not symbols or row[0] != symbols[-1]:
+                symbols.append(row[0])
+                starts.append(filled + len(block))
+            block.append(row)
+            if len(block) >= 10_000:
+                flush()
+        flush()
+
+        offsets = np.array(starts + [filled], dtype="int64")
+        columns = {f: values[i, :filled] for i, f in enumerate(FIELDS)}
+        return cls(symbols, offsets, dates[:filled], columns)
+
+    @classmethod
+    def from_sqlite(cls, conn, provider=None, start_date=None, symbols=None):
+        """
+        Loads stored bars into a store with one ordered query.
+
+        Parameters:
+        conn (sqlite3.Connection): An open database connection.
+        provider (str, optional): A provider name to read from 'daily_bars'. None reads 'weekly_data'.
+        start_date (str, optional): Only bars on or after this "YYYY-MM-DD" date.
+        symbols (list, optional): Only these symbols. Default is every stored symbol.
+
+        What the code does:
+        - Counts the matching rows first so the columns are allocated exactly once.
+        - Streams the rows ordered by symbol and date into the columns with from_rows.
+
+        Returns:
+        BarStore: The bars, one run per symbol.
+        """
+        if provider is None:
+            source = "weekly_data JOIN stocks ON weekly_data.stock_id = stocks.id"
+            where, params = [], []
+        else:
+            source = """daily_bars
+                JOIN stocks ON daily_bars.stock_id = stocks.id
+                JOIN providers ON daily_bars.provider_id = providers.id"""
+            where, params = ["providers.name = ?"], [provider]
+        if start_date is not None:
+            where.append("date >= ?")
+            params.append(start_date)
+        if symbols is not None:
+            where.append(f"stocks.symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(symbols)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        count = conn.execute(f"SELECT COUNT(*) FROM {source}{clause}", params).fetchone()[0]
+        cur = conn.execute(f"""
+            SELECT stocks.symbol, date, open, high, low, close, volume
+            FROM {source}{clause}
+            ORDER BY stocks.symbol, date
+        """, params)
+        return cls.from_rows(cur, count)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Packs OHLCV DataFrames from normalize.py into a store.
+
+        Parameters:
+        frames (dict): Symbol mapped to a frame with a date index and FIELDS columns.
+
+        Returns:
+        BarStore: The bars, symbols in sorted order.
+        """
+        symbols = sorted(s for s, frame in frames.items() if len(frame))
+        if not symbols:
+            return cls.empty()
+        lengths = [len(frames[s]) for s in symbols]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype("int64")
+        dates = np.concatenate([to_days(frames[s].index.values) for s in symbols])
+        columns = {f: np.concatenate([frames[s][f].to_numpy(dtype="float64") for s in symbols]) for f in FIELDS}
+        return cls(symbols, offsets, dates, columns)
+
+    #### PERSISTENCE: ####
+
+    def save(self, path):
+        """
+        Writes the store as a directory of .npy files plus a symbols.json list.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        np.save(os.path.join(path, "dates.npy"), self.dates)
+        for field, column in self.columns.items():
+            np.save(os.path.join(path, f"{field}.npy"), np.ascontiguousarray(column))
+        with open(os.path.join(path, "symbols.json"), "w") as f:
+            json.dump(self.symbols, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Opens a store written by save().
+
+        Parameters:
+        path (str): The store directory.
+        mmap (bool): Memory-map the columns read-only instead of reading them. Pages are then
+            loaded on first touch and shared between processes. Default is True.
+
+        Returns:
+        BarStore: The stored bars.
+        """
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "symbols.json")) as f:
+            symbols = json.load(f)
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        dates = np.load(os.path.join(path, "dates.npy"), mmap_mode=mode)
+        columns = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode=mode) for f in FIELDS}
+        return cls(symbols, offsets, dates, columns)
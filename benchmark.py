@@ -0,0 +1,193 @@
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import data
+from cache import response_cache
+from rate_limit import quota_scheduler
+
+HTTP_PROVIDERS = ["alpha_vantage", "financialdatasets", "polygon"]
+ALL_PROVIDERS = HTTP_PROVIDERS + ["yahoo"]
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile (0-100) of values with linear interpolation, or None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def time_request(provider, symbol, start_date, end_date, respect_rate_limits=True):
+    """
+    Sends one request through the provider's pooled session and times each phase.
+
+    Parameters:
+    provider (str): A provider name. Yahoo Finance is timed as a whole call since its
+        response is turned into a DataFrame inside fetch_yahoo_data.
+    symbol (str): The stock ticker symbol.
+    start_date (str): Start date in "YYYY-MM-DD" format.
+    end_date (str): End date in "YYYY-MM-DD" format.
+    respect_rate_limits (bool): Wait for the provider's rate limit first. Default is True.
+
+    What the code does:
+    - Streams the response so the time to the first body byte is separate from the download.
+    - Parses the body with json.loads and times that on its own.
+
+    Returns:
+    dict: total, ttfb, download and parse times in seconds, bytes received and any error.
+    """
+    if respect_rate_limits and provider in HTTP_PROVIDERS:
+        quota_scheduler.acquire(provider, data.PROVIDER_API_KEYS.get(provider))
+
+    sample = {"total": None, "ttfb": None, "download": None, "parse": None, "bytes": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        if provider == "yahoo":
+            frame = data.fetch_yahoo_data(symbol, period=data.yahoo_period(start_date, end_date))
+            sample["total"] = time.perf_counter() - start
+            sample["bytes"] = int(frame.memory_usage(deep=True).sum())
+            return sample
+
+        url, params, headers = data.provider_request(provider, symbol, start_date, end_date)
+        session = data.get_session(provider)
+        timeout = (data.HTTP_CONNECT_TIMEOUT, data.HTTP_READ_TIMEOUT)
+        with session.get(url, params=params, headers=headers, stream=True, timeout=timeout) as response:
+            chunks = response.iter_content(chunk_size=64 * 1024)
+            first = next(chunks, b"")
+            first_byte = time.perf_counter()
+            body = b"".join([first, *chunks])
+        downloaded = time.perf_counter()
+        json.loads(body)
+        parsed = time.perf_counter()
+
+        sample.update(
+            total=parsed - start,
+            ttfb=first_byte - start,
+            download=downloaded - first_byte,
+            parse=parsed - downloaded,
+            bytes=len(body),
+        )
+        if response.status_code >= 400:
+            sample["error"] = f"HTTP {response.status_code}"
+    except Exception as e:
+        sample["total"] = time.perf_counter() - start
+        sample["error"] = f"{type(e).__name__}: {e}"
+    return sample
+
+def summarize(samples):
+    """
+    Reduces timing samples to p50/p95/p99 latency plus phase and size medians.
+    Failed samples are counted but left out of the latency figures.
+    """
+    ok = [s for s in samples if s["error"] is None]
+    totals = [s["total"] for s in ok]
+    phase = lambda key: percentile([s[key] for s in ok if s[key] is not None], 50)
+    return {
+        "count": len(samples),
+        "errors": len(samples) - len(ok),
+        "p50": percentile(totals, 50),
+        "p95": percentile(totals, 95),
+        "p99": percentile(totals, 99),
+        "ttfb_p50": phase("ttfb"),
+        "download_p50": phase("download"),
+        "parse_p50": phase("parse"),
+        "bytes_p50": phase("bytes"),
+    }
+
+def run_benchmark(providers=ALL_PROVIDERS, symbol="AAPL", repetitions=10, warmup=1, concurrency=1,
+                  days=30, respect_rate_limits=True):
+    """
+    Benchmarks each provider's fetch path.
+
+    Parameters:
+    providers (list): Provider names. Default is all four.
+    symbol (str): The stock ticker symbol to request. Default is "AAPL".
+    repetitions (int): Measured requests per provider. Default is 10.
+    warmup (int): Unmeasured requests per provider sent first to open connections. Default is 1.
+    concurrency (int): Requests in flight at once per provider. Default is 1.
+    days (int): Length of the requested date range, ending today. Default is 30.
+    respect_rate_limits (bool): Honor the per-key rate limits. Turn off against a local server.
+
+    What the code does:
+    - Disables the response cache for the duration so every request reaches the server.
+    - Runs the warmup requests, then the measured ones through a thread pool of `concurrency`.
+    - Summarizes each provider's samples with summarize().
+
+    Returns:
+    dict: Provider name mapped to its summary.
+    """
+    end = datetime.now()
+    start_date = (end - timedelta(days=days)).strftime('%Y-%m-%d')
+    end_date = end.strftime('%Y-%m-%d')
+    run = lambda provider: time_request(provider, symbol, start_date, end_date, respect_rate_limits)
+
+    cache_enabled = response_cache.enabled
+    response_cache.enabled = False
+    results = {}
+    try:
+        for provider in providers:
+            for _ in range(warmup):
+                run(provider)
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                samples = list(pool.map(lambda _: run(provider), range(repetitions)))
+            results[provider] = summarize(samples)
+    finally:
+        response_cache.enabled = cache_enabled
+    return results
+
+def format_results(results):
+    """
+    Formats benchmark summaries as a fixed-width table in milliseconds.
+    """
+    ms = lambda v: "-" if v is None else f"{v * 1000:.1f}"
+    lines = [f"{'provider':<18}{'n':>4}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'ttfb':>9}{'parse':>9}{'bytes':>10}"]
+    for provider, r in results.items():
+        size = "-" if r["bytes_p50"] is None else f"{r['bytes_p50']:.0f}"
+        lines.append(
+            f"{provider:<18}{r['count']:>4}{r['errors']:>5}{ms(r['p50']):>9}{ms(r['p95']):>9}"
+            f"{ms(r['p99']):>9}{ms(r['ttfb_p50']):>9}{ms(r['parse_p50']):>9}{size:>10}"
+        )
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the provider fetch path")
+    parser.add_argument("--providers", nargs="+", default=None, choices=ALL_PROVIDERS)
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("-n", "--repetitions", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--mock", action="store_true", help="run against a local emulator instead of the live APIs")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    emulator = None
+    providers = args.providers or ALL_PROVIDERS
+    if args.mock:
+        from emulator import ProviderEmulator
+        emulator = ProviderEmulator().start()
+        emulator.point_data_at()
+
+    try:
+        report = {}
+        for concurrency in args.concurrency:
+            report[concurrency] = run_benchmark(
+                providers, args.symbol, args.repetitions, args.warmup, concurrency,
+                args.days, respect_rate_limits=not args.mock
+            )
+    finally:
+        if emulator is not None:
+            emulator.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for concurrency, results in report.items():
+            print(f"\nconcurrency={concurrency}")
+            print(format_results(results))
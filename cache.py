@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+from metrics import registry
+
+# Where cached provider responses are stored and how large the cache may grow
+CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", Path(__file__).parent / ".cache" / "responses"))
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") != "0"
+
+# Seconds a cached response stays fresh, per provider. Weekly series barely
+# change during a day while daily bars can update after the close.
+CACHE_TTL = {
+    "alpha_vantage": 6 * 60 * 60,
+    "yahoo": 15 * 60,
+    "financialdatasets": 60 * 60,
+    "polygon": 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+
+class ResponseCache:
+    """
+    On-disk cache of provider responses keyed on (provider, symbol, date range).
+
+    Entries are pickled into one file per key, named by the SHA-256 of the key.
+    A file's modification time records its last use so the least recently used
+    entries are evicted first once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl=None, enabled=CACHE_ENABLED):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = dict(CACHE_TTL, **(ttl or {}))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def key(self, provider, symbol, start_date=None, end_date=None, extra=None):
+        """
+        Returns the content address for a request as a hex digest.
+        """
+        raw = json.dumps([provider, symbol, start_date, end_date, extra])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def _current_size(self):
+        # Scanned once per process, then kept up to date on every store and eviction
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.directory.glob("*/*.pkl"))
+        return self._size
+
+    def get(self, provider, symbol, start_date=None, end_date=None, extra=None):
+        """
+        Looks up a cached response.
+
+        Parameters:
+        provider (str): The provider name.
+        symbol (str): The stock ticker symbol.
+        start_date (str, optional): Start of the requested range.
+        end_date (str, optional): End of the requested range.
+        extra (optional): Any other request parameter that changes the response.
+
+        Returns:
+        object or None: The cached payload, or None on a miss or an expired entry.
+        """
+        path = self._path(self.key(provider, symbol, start_date, end_date, extra))
+        try:
+            with open(path, "rb") as f:
+                created, payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - created > self.ttl.get(provider, DEFAULT_TTL):
+            self._remove(path)
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            return None
+
+        # Touch the file so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def put(self, provider, symbol, payload, start_date=None, end_date=None, extra=None):
+        """
+        Stores a response and evicts least recently used entries if the cache is over budget.
+        """
+        path = self._path(self.key(provider, symbol, start_date, end_date, extra))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps((time.time(), payload), protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Write to a temporary file first so readers never see a partial entry
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            size = self._current_size()
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._size = size + len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_or_fetch(self, provider, symbol, fetch, start_date=None, end_date=None, extra=None, validate=None):
+        """
+        Returns a cached response or calls fetch() and caches its result.
+
+        Parameters:
+        provider (str): The provider name.
+        symbol (str): The stock ticker symbol.
+        fetch (callable): Performs the real request when there is no fresh entry.
+        start_date (str, optional): Start of the requested range.
+        end_date (str, optional): End of the requested range.
+        extra (optional): Any other request parameter that changes the response.
+        validate (callable, optional): Only responses for which this returns True are cached,
+            so rate-limit and error payloads are never served from the cache.
+
+        Returns:
+        object: The response payload.
+        """
+        if not self.enabled:
+            return fetch()
+        payload = self.get(provider, symbol, start_date, end_date, extra)
+        if payload is not None:
+            registry.inc("cache_hits_total", provider=provider)
+            return payload
+        registry.inc("cache_misses_total", provider=provider)
+        payload = fetch()
+        if validate is None or validate(payload):
+            self.put(provider, symbol, payload, start_date, end_date, extra)
+        return payload
+
+    def _remove(self, path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _evict(self):
+        # Called with the lock held. Drops the oldest entries until the cache is
+        # 10% under budget so eviction does not run on every store.
+        entries = []
+        for p in self.directory.glob("*/*.pkl"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        size = sum(e[1] for e in entries)
+        for _, entry_size, p in entries:
+            if size <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+    def clear(self):
+        """
+        Deletes every cached entry and resets the counters.
+        """
+        with self._lock:
+            for p in self.directory.glob("*/*.pkl"):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+            self._size = 0
+            self.hits = self.misses = self.expired = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and current size as a dictionary.
+        """
+        with self._lock:
+            size = self._current_size() if self.directory.exists() else 0
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": size,
+            }
+
+
+# Shared cache used by the fetchers in data.py
+response_cache = ResponseCache()
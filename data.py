@@ -1,9 +1,19 @@
 import os
-import requests
-import yfinance as yf
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from pathlib import Path
+from cache import response_cache
+from lazy import lazy_import
+from metrics import instrument, registry
+from rate_limit import quota_scheduler
+
+# Imported on first use; yfinance alone pulls in most of the scientific stack
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
+yf = lazy_import("yfinance")
 
 # Load environment variables
 load_dotenv(dotenv_path=Path(__file__).parent / ".env")
@@ -13,15 +23,355 @@ ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
 FINANCIAL_DATASETS_API_KEY = os.getenv("FINANCIAL_DATASETS_API_KEY")
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 
+# Rate limits are tracked per API key
+PROVIDER_API_KEYS = {
+    "alpha_vantage": ALPHA_API_KEY,
+    "financialdatasets": FINANCIAL_DATASETS_API_KEY,
+    "polygon": POLYGON_API_KEY,
+}
+
+# Base URLs, overridable so the fetchers can be pointed at a local stand-in server
+ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL", "https://www.alphavantage.co")
+FINANCIAL_DATASETS_BASE_URL = os.getenv("FINANCIAL_DATASETS_BASE_URL", "https://api.financialdatasets.ai")
+POLYGON_BASE_URL = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
+# Unset means yfinance talks to Yahoo itself; set it to read the v8 chart API from another host
+YAHOO_BASE_URL = os.getenv("YAHOO_BASE_URL")
+
 # Common date range
 end_date = datetime.now()
 start_date = end_date - timedelta(days=7)
 START_DATE = start_date.strftime('%Y-%m-%d')
 END_DATE = end_date.strftime('%Y-%m-%d')
 
+#### HTTP SESSIONS: ####
+
+# Connection pool and retry settings shared by every provider session
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def _build_session():
+    """
+    Creates a requests Session with a keep-alive connection pool and retry policy.
+
+    What the code does:
+    - Retries GET requests on connection errors and on 429/5xx responses.
+    - Waits with exponential backoff between attempts, honoring any Retry-After header.
+    - Mounts the same adapter for http and https so the pool is reused across calls.
+
+    Returns:
+    requests.Session: A configured session.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(provider):
+    """
+    Returns the long-lived session for a provider, creating it on first use.
+
+    Parameters:
+    provider (str): The provider name, e.g. "alpha_vantage" or "polygon".
+
+    Returns:
+    requests.Session: The pooled session dedicated to that provider.
+    """
+    with _sessions_lock:
+        if provider not in _sessions:
+            _sessions[provider] = _build_session()
+        return _sessions[provider]
+
+def configure_http(pool_size=None, connect_timeout=None, read_timeout=None, max_retries=None, backoff_factor=None):
+    """
+    Overrides the HTTP settings and drops existing sessions so new ones pick them up.
+
+    Parameters:
+    pool_size (int, optional): Maximum kept-alive connections per provider.
+    connect_timeout (float, optional): Seconds to wait for a connection.
+    read_timeout (float, optional): Seconds to wait between bytes of the response.
+    max_retries (int, optional): Retry attempts on connection errors and 429/5xx.
+    backoff_factor (float, optional): Base of the exponential backoff in seconds.
+
+    Returns:
+    None
+    """
+    global HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR
+    if pool_size is not None:
+        HTTP_POOL_SIZE = pool_size
+    if connect_timeout is not None:
+        HTTP_CONNECT_TIMEOUT = connect_timeout
+    if read_timeout is not None:
+        HTTP_READ_TIMEOUT = read_timeout
+    if max_retries is not None:
+        HTTP_MAX_RETRIES = max_retries
+    if backoff_factor is not None:
+        HTTP_BACKOFF_FACTOR = backoff_factor
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def _http_get(provider, url, **kwargs):
+    """
+    Sends a GET request through the provider's pooled session with the configured timeouts,
+    after waiting for a slot in that provider's rate limit.
+    """
+    quota_scheduler.acquire(provider, PROVIDER_API_KEYS.get(provider))
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    response = get_session(provider).get(url, **kwargs)
+    registry.inc("http_requests_total", provider=provider, status=response.status_code)
+    # A streamed body has not been read yet, so only its declared length is known
+    size = response.headers.get("Content-Length") if kwargs.get("stream") else len(response.content)
+    if size:
+        registry.inc("http_bytes_total", int(size), provider=provider)
+    return response
+
+def stream_get(provider, url, params=None, headers=None):
+    """
+    Sends a GET request whose body is read as it arrives, for parsers that work on chunks.
+
+    Parameters:
+    provider (str): The provider whose rate limit, session and metrics the request counts against.
+    url (str): The request URL, e.g. from provider_request.
+    params (dict, optional): Query parameters.
+    headers (dict, optional): Extra request headers.
+
+    What the code does:
+    - Goes through _http_get like every fetcher, so it waits for the provider's rate limit,
+      reuses its pooled session and is counted in the HTTP metrics.
+    - Leaves the body unread; only its declared length is counted in http_bytes_total.
+
+    Returns:
+    requests.Response: The open response. The caller reads it with iter_content and closes it.
+
+    Raises:
+    requests.HTTPError: On a 4xx or 5xx status, after closing the response.
+    """
+    response = _http_get(provider, url, params=params, headers=headers, stream=True)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return response
+
+#### REQUEST BUILDING: ####
+
+def provider_request(provider, symbol, start_date=None, end_date=None, interval="day"):
+    """
+    Builds the HTTP request for one of the REST providers.
+
+    Parameters:
+    provider (str): "alpha_vantage", "financialdatasets" or "polygon".
+    symbol (str): The stock ticker symbol.
+    start_date (str, optional): Start date in "YYYY-MM-DD" format.
+    end_date (str, optional): End date in "YYYY-MM-DD" format.
+    interval (str, optional): Bar size for the ranged providers, "day" or "week".
+
+    Returns:
+    tuple: (url, params, headers) ready to pass to a requests session.
+    """
+    if provider == "alpha_vantage":
+        params = {
+            "function": "TIME_SERIES_WEEKLY",
+            "symbol": symbol,
+            "apikey": ALPHA_API_KEY
+        }
+        return f"{ALPHA_BASE_URL}/query", params, {}
+    if provider == "financialdatasets":
+        params = {
+            "ticker": symbol,
+            "interval": interval,
+            "interval_multiplier": 1,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+        return f"{FINANCIAL_DATASETS_BASE_URL}/prices/", params, {"X-Api-Key": FINANCIAL_DATASETS_API_KEY}
+    if provider == "polygon":
+        url = f"{POLYGON_BASE_URL}/v2/aggs/ticker/{symbol}/range/1/{interval}/{start_date}/{end_date}"
+        params = {
+            "apiKey": POLYGON_API_KEY,
+            "adjusted": "true",
+            "sort": "asc"
+        }
+        return url, params, {}
+    raise ValueError(f"No HTTP request for provider: {provider}")
+
+#### RESPONSE VALIDATION: ####
+
+# Only responses that actually carry data are cached. Rate-limit notices and
+# error messages come back as JSON too and must not be replayed from the cache.
+def _is_valid_alpha(payload):
+    return isinstance(payload, dict) and "Weekly Time Series" in payload
+
+def _is_valid_yahoo(payload):
+    return payload is not None and not payload.empty
+
+def _is_valid_financialdatasets(payload):
+    return isinstance(payload, dict) and "prices" in payload
+
+def _is_valid_polygon(payload):
+    return isinstance(payload, dict) and payload.get("status") in ("OK", "DELAYED")
+
+# Validator of each fetcher's payload, by provider
+PAYLOAD_VALIDATORS = {
+    "alpha_vantage": _is_valid_alpha,
+    "yahoo": _is_valid_yahoo,
+    "financialdatasets": _is_valid_financialdatasets,
+    "polygon": _is_valid_polygon,
+}
+
+# Fields in which the providers put a notice or error message instead of data
+_PAYLOAD_ERROR_FIELDS = ("Note", "Error Message", "Information", "error", "message", "status")
+
+def _payload_problem(provider, payload):
+    # (class, message) of a payload without data, e.g. ("payload_note", "...rate limit..."), or None
+    if PAYLOAD_VALIDATORS[provider](payload):
+        return None
+    if isinstance(payload, dict):
+        for field in _PAYLOAD_ERROR_FIELDS:
+            if payload.get(field):
+                return "payload_" + field.lower().replace(" ", "_"), str(payload[field])
+    return "payload_no_data", f"{provider} returned no data"
+
+def payload_error(provider, payload):
+    """
+    Describes why a fetcher's payload carries no data, or returns None if it does.
+
+    Parameters:
+    provider (str): The provider the payload came from.
+    payload (dict or DataFrame): Whatever the provider's fetcher returned.
+
+    Returns:
+    str or None: The provider's own notice or error message where it sent one.
+    """
+    problem = _payload_problem(provider, payload)
+    return None if problem is None else problem[1]
+
+def _is_daily_quota_notice(message):
+    # Alpha Vantage's daily cap answers "...rate limit is 25 requests per day"; its older
+    # per-minute notice speaks of "calls per minute" and only needs the minute bucket
+    message = message.lower()
+    return "rate limit" in message and "per minute" not in message
+
+def check_payload(provider, payload):
+    """
+    Acts on an error that a provider delivered as a normal response rather than an HTTP error.
+
+    Parameters:
+    provider (str): The provider the payload came from.
+    payload (dict or DataFrame): What the provider's request returned.
+
+    What the code does:
+    - Counts the failure in errors_total under the provider's fetch stage, with the field the
+      message came in as the error class (e.g. "payload_note"), since no exception is raised.
+    - Marks the provider key's quota as used up for the day when the payload says the daily
+      limit is reached, so neither this run nor a later one sends requests that would be refused.
+
+    Returns:
+    str or None: payload_error's description, or None if the payload carries data.
+    """
+    problem = _payload_problem(provider, payload)
+    if problem is None:
+        return None
+    kind, error = problem
+    registry.inc("errors_total", stage=f"fetch.{provider}", error=kind)
+    if _is_daily_quota_notice(error):
+        quota_scheduler.exhaust(provider, PROVIDER_API_KEYS.get(provider))
+    return error
+
+#### COALESCING IDENTICAL REQUESTS: ####
+
+class InFlightRequests:
+    """
+    Lets concurrent callers asking for the same response share a single request.
+
+    The first caller for a key runs the fetch. Anyone asking for that key before it finishes
+    waits on the same Future and gets the same payload, or the same exception. Nothing is kept
+    once the fetch completes, so only overlapping requests are merged; repeats over time are
+    the response cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._futures)
+
+    def run(self, key, fetch):
+        """
+        Returns fetch()'s result, calling it only if no identical request is already running.
+
+        Parameters:
+        key (tuple): Identifies the request; its first item is the provider name.
+        fetch (callable): Performs the request.
+
+        Returns:
+        object: The payload, shared with every caller that joined the request.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+        if not leader:
+            registry.inc("coalesced_requests_total", provider=key[0])
+            return future.result()
+        try:
+            payload = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(payload)
+            return payload
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+# Requests currently being fetched, shared by every fetcher in the process
+in_flight = InFlightRequests()
+
+def _fetch_once(provider, symbol, fetch, start_date=None, end_date=None, extra=None, validate=None):
+    """
+    Reads through the response cache, joining an identical request if one is already in flight.
+    Callers that join get the very same payload object, so it must be treated as read-only.
+    Every payload fetched over the network first goes through check_payload.
+    """
+    def checked():
+        payload = fetch()
+        check_payload(provider, payload)
+        return payload
+
+    def cached():
+        return response_cache.get_or_fetch(provider, symbol, checked, start_date, end_date, extra, validate)
+    return in_flight.run((provider, symbol, start_date, end_date, extra), cached)
+
 #### FETCHING DATA FROM EACH API: ####
 
 # Alpha Vantage
+@instrument("fetch.alpha_vantage")
 def fetch_alpha_vantage_data(symbol):
     """
     Fetches weekly stock data for a given symbol using the Alpha Vantage API.
@@ -31,23 +381,25 @@ def fetch_alpha_vantage_data(symbol):
 
     What the code does:
     - Constructs an API request using the symbol and Alpha Vantage key.
-    - Sends a GET request to retrieve weekly stock data.
+    - Returns a cached response if one is still fresh, or waits for an identical request already in flight.
+    - Otherwise sends a GET request through the pooled Alpha Vantage session.
     - Parses and returns the response in JSON format.
 
     Returns:
     dict: A JSON object containing weekly stock data including open, high, low, close, and volume.
     """
     
-    url = "https://www.alphavantage.co/query"
-    params = {
-        "function": "TIME_SERIES_WEEKLY",
-        "symbol": symbol,
-        "apikey": ALPHA_API_KEY
-    }
-    response = requests.get(url, params=params)
-    return response.json()
+    url, params, headers = provider_request("alpha_vantage", symbol)
+
+    def fetch():
+        return _http_get("alpha_vantage", url, params=params, headers=headers).json()
+
+    return _fetch_once(
+        "alpha_vantage", symbol, fetch, extra="TIME_SERIES_WEEKLY", validate=_is_valid_alpha
+    )
 
 # Yahoo Finance
+@instrument("fetch.yahoo")
 def fetch_yahoo_data(symbol, period="7d"):
     """
     Retrieves recent historical stock data using Yahoo Finance.
@@ -57,19 +409,41 @@ def fetch_yahoo_data(symbol, period="7d"):
     period (str, optional): The time period to retrieve (e.g., "7d", "1mo"). Default is "7d".
 
     What the code does:
-    - Initializes a Ticker object using yfinance.
+    - Returns a cached DataFrame if one is still fresh, or waits for an identical request already in flight.
+    - Otherwise initializes a Ticker object using yfinance.
     - Requests historical data for the given symbol and period.
+    - When YAHOO_BASE_URL is set, reads the chart API from that host through the pooled session instead.
     - Returns the data as a Pandas object.
 
     Returns:
     Pamdas object: A DataFrame with columns like Open, High, Low, Close, and Volume.
     """
     
-    stock = yf.Ticker(symbol)
-    return stock.history(period=period)
+    def fetch():
+        if YAHOO_BASE_URL:
+            return _yahoo_chart_frame(symbol, period)
+        stock = yf.Ticker(symbol)
+        return stock.history(period=period)
+
+    return _fetch_once("yahoo", symbol, fetch, extra=period, validate=_is_valid_yahoo)
+
+def _yahoo_chart_frame(symbol, period):
+    """
+    Reads Yahoo's v8 chart JSON from YAHOO_BASE_URL and shapes it like Ticker.history().
+    """
+    url = f"{YAHOO_BASE_URL}/v8/finance/chart/{symbol}"
+    response = _http_get("yahoo", url, params={"range": period, "interval": "1d"})
+    response.raise_for_status()
+    result = (response.json().get("chart", {}).get("result") or [{}])[0]
+    timestamps = result.get("timestamp") or []
+    quote = (result.get("indicators", {}).get("quote") or [{}])[0]
+    index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert("America/New_York")
+    columns = {name.capitalize(): quote.get(name, [None] * len(timestamps)) for name in ("open", "high", "low", "close", "volume")}
+    return pd.DataFrame(columns, index=index.rename("Date"))
 
 # FinancialDatasets.ai
-def fetch_financialdatasets_data(symbol, start_date, end_date):
+@instrument("fetch.financialdatasets")
+def fetch_financialdatasets_data(symbol, start_date, end_date, interval="day"):
     """
     Fetches daily stock data from FinancialDatasets.ai for a given date range.
 
@@ -77,23 +451,31 @@ def fetch_financialdatasets_data(symbol, start_date, end_date):
     symbol (str): The stock ticker symbol.
     start_date (str): Start date in "YYYY-MM-DD" format.
     end_date (str): End date in "YYYY-MM-DD" format.
+    interval (str, optional): Bar size, "day" or "week". Default is "day".
 
     What the code does:
     - Builds a request URL with query parameters.
-    - Sends a GET request to the FinancialDatasets.ai API.
+    - Returns a cached response if one is still fresh, or waits for an identical request already in flight.
+    - Otherwise sends a GET request through the pooled FinancialDatasets.ai session.
     - Parses and returns the response as JSON.
 
     Returns:
     Dict: A JSON object with daily prices including open, high, low, close, and timestamps.
     """
     
-    url = f"https://api.financialdatasets.ai/prices/?ticker={symbol}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    headers = {"X-Api-Key": FINANCIAL_DATASETS_API_KEY}
-    response = requests.get(url, headers=headers)
-    return response.json()
+    url, params, headers = provider_request("financialdatasets", symbol, start_date, end_date, interval)
+
+    def fetch():
+        return _http_get("financialdatasets", url, params=params, headers=headers).json()
+
+    return _fetch_once(
+        "financialdatasets", symbol, fetch, start_date, end_date, extra=interval,
+        validate=_is_valid_financialdatasets
+    )
 
 # Polygon.io
-def fetch_polygon_daily_data(symbol, start_date, end_date):
+@instrument("fetch.polygon")
+def fetch_polygon_daily_data(symbol, start_date, end_date, timespan="day"):
     """
     Fetches daily price data from Polygon.io for the given symbol and date range.
 
@@ -101,21 +483,359 @@ def fetch_polygon_daily_data(symbol, start_date, end_date):
     symbol (str): The stock ticker symbol.
     start_date (str): Start date in "YYYY-MM-DD" format.
     end_date (str): End date in "YYYY-MM-DD" format.
+    timespan (str, optional): Bar size, "day" or "week". Default is "day".
 
     What the code does:
     - Constructs a GET request to the Polygon.io API.
-    - Sends the request with parameters for date range and ticker.
+    - Returns a cached response if one is still fresh, or waits for an identical request already in flight.
+    - Otherwise sends the request through the pooled Polygon.io session.
     - Returns parsed response data in JSON format.
 
     Returns:
     dict: A JSON object with daily data including open, high, low, close, and volume.
     """
     
-    url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start_date}/{end_date}"
-    params = {
-        "apiKey": POLYGON_API_KEY,
-        "adjusted": "true",
-        "sort": "asc"
-    }
-    response = requests.get(url, params=params)
-    return response.json()
+    url, params, headers = provider_request("polygon", symbol, start_date, end_date, timespan)
+
+    def fetch():
+        return _http_get("polygon", url, params=params, headers=headers).json()
+
+    return _fetch_once(
+        "polygon", symbol, fetch, start_date, end_date, extra=timespan, validate=_is_valid_polygon
+    )
+
+#### MULTI-SYMBOL REQUESTS: ####
+
+# Tickers per yf.download call
+YAHOO_BATCH_SIZE = int(os.getenv("YAHOO_BATCH_SIZE", "100"))
+
+def _split_download(frame, symbols):
+    # yf.download puts each ticker under its own top-level column when group_by="ticker".
+    # Rows where a ticker has no bar come back as all-NaN and are dropped, which leaves an
+    # unknown ticker with an empty frame, as Ticker.history() would give.
+    if isinstance(frame.columns, pd.MultiIndex):
+        available = set(frame.columns.get_level_values(0))
+        pieces = {s: frame[s] for s in symbols if s in available}
+    else:
+        pieces = {symbols[0]: frame} if len(symbols) == 1 else {}
+    return {s: pieces[s].dropna(how="all").rename_axis(columns=None) if s in pieces else pd.DataFrame() for s in symbols}
+
+@instrument("fetch.yahoo_batch")
+def fetch_yahoo_batch(symbols, period="7d"):
+    """
+    Retrieves recent history for many symbols with a single yf.download call.
+
+    Parameters:
+    symbols (list): The stock ticker symbols.
+    period (str, optional): The time period to retrieve (e.g., "7d", "1mo"). Default is "7d".
+
+    What the code does:
+    - Serves every symbol with a fresh cached DataFrame from the response cache.
+    - Downloads the rest together and splits the result into one frame per symbol with
+      Ticker.history()'s price columns, so normalize_yahoo treats it the same.
+    - Caches each symbol's frame under its own key. The frames lack history()'s dividend and
+      split columns and its time zone, so fetch_yahoo_data never reads them from the cache.
+    - When YAHOO_BASE_URL is set, falls back to one chart request per symbol, since that host
+      is not reachable through yfinance.
+
+    Returns:
+    dict: Symbol mapped to its DataFrame.
+    """
+    extra = ["download", period]
+    frames = {}
+    missing = []
+    for symbol in dict.fromkeys(symbols):
+        cached = response_cache.get("yahoo", symbol, extra=extra) if response_cache.enabled else None
+        if cached is not None:
+            registry.inc("cache_hits_total", provider="yahoo")
+            frames[symbol] = cached
+        else:
+            missing.append(symbol)
+    if not missing:
+        return frames
+    if YAHOO_BASE_URL:
+        frames.update((s, fetch_yahoo_data(s, period)) for s in missing)
+        return frames
+
+    registry.inc("cache_misses_total", len(missing), provider="yahoo")
+    download = yf.download(
+        missing, period=period, interval="1d", group_by="ticker",
+        auto_adjust=True, actions=False, progress=False, threads=True
+    )
+    for symbol, frame in _split_download(download, missing).items():
+        if response_cache.enabled and _is_valid_yahoo(frame):
+            response_cache.put("yahoo", symbol, frame, extra=extra)
+        frames[symbol] = frame
+    return frames
+
+@instrument("fetch.polygon_grouped")
+def fetch_polygon_grouped_daily(date):
+    """
+    Fetches one day's bar for every US stock from Polygon.io's grouped daily endpoint.
+
+    Parameters:
+    date (str): The trading day in "YYYY-MM-DD" format.
+
+    Returns:
+    dict: A JSON object whose "results" hold one bar per ticker, named by its "T" field.
+    """
+    url = f"{POLYGON_BASE_URL}/v2/aggs/grouped/locale/us/market/stocks/{date}"
+    params = {"apiKey": POLYGON_API_KEY, "adjusted": "true"}
+
+    def fetch():
+        return _http_get("polygon", url, params=params).json()
+
+    return _fetch_once("polygon", "*", fetch, date, date, extra="grouped", validate=_is_valid_polygon)
+
+def _weekdays(start_date, end_date):
+    """
+    Returns the Monday-to-Friday dates from start_date to end_date as "YYYY-MM-DD" strings.
+    """
+    day = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    days = []
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day.strftime('%Y-%m-%d'))
+        day += timedelta(days=1)
+    return days
+
+def split_grouped_daily(symbols, start_date, end_date, grouped):
+    """
+    Turns grouped daily responses into the per-symbol responses fetch_polygon_daily_data returns.
+
+    Parameters:
+    symbols (list): The stock ticker symbols to pick out.
+    start_date (str): Start date of the range in "YYYY-MM-DD" format.
+    end_date (str): End date of the range in "YYYY-MM-DD" format.
+    grouped (list): (day, response) pairs from fetch_polygon_grouped_daily, oldest day first.
+
+    What the code does:
+    - Picks the requested symbols out of each day and rebuilds their aggregates responses.
+    - Caches each symbol's response under the same key fetch_polygon_daily_data uses.
+
+    Returns:
+    dict: Symbol mapped to its aggregates response.
+
+    Raises:
+    ValueError: If any day's request failed, since every symbol would be missing that day.
+    """
+    results = {s: [] for s in symbols}
+    for day, payload in grouped:
+        if not _is_valid_polygon(payload):
+            detail = payload.get("error") or payload.get("status") if isinstance(payload, dict) else payload
+            raise ValueError(f"Polygon.io grouped daily bars for {day} failed: {detail}")
+        for bar in payload.get("results") or []:
+            bars = results.get(bar.get("T"))
+            if bars is not None:
+                bars.append({k: v for k, v in bar.items() if k != "T"})
+
+    payloads = {}
+    for symbol, bars in results.items():
+        payloads[symbol] = {
+            "ticker": symbol,
+            "status": "OK",
+            "adjusted": True,
+            "queryCount": len(bars),
+            "resultsCount": len(bars),
+            "results": bars,
+        }
+        if response_cache.enabled:
+            response_cache.put("polygon", symbol, payloads[symbol], start_date, end_date, extra="day")
+    return payloads
+
+def fetch_polygon_daily_batch(symbols, start_date, end_date):
+    """
+    Fetches daily bars for many symbols with one Polygon.io request per trading day.
+
+    Parameters:
+    symbols (list): The stock ticker symbols.
+    start_date (str): Start date in "YYYY-MM-DD" format.
+    end_date (str): End date in "YYYY-MM-DD" format.
+
+    What the code does:
+    - Pulls the grouped daily bars of every weekday in the range, one after another. Each
+      response covers the whole market, so the request count depends on the days, not the
+      symbols. fetch_many instead spreads the days over the Polygon.io pool.
+    - Splits them into per-symbol responses with split_grouped_daily.
+
+    Returns:
+    dict: Symbol mapped to its aggregates response.
+    """
+    days = _weekdays(start_date, end_date)
+    return split_grouped_daily(symbols, start_date, end_date, [(d, fetch_polygon_grouped_daily(d)) for d in days])
+
+#### FETCHING MANY SYMBOLS AT ONCE: ####
+
+# One unit of work for fetch_many. Alpha Vantage ignores the dates and interval
+# (it is always weekly) and Yahoo Finance turns the dates into a period ending today.
+FetchJob = namedtuple("FetchJob", ["provider", "symbol", "start_date", "end_date", "interval"], defaults=["day"])
+
+# Maximum number of requests each provider may have in flight at once
+PROVIDER_CONCURRENCY = {
+    "alpha_vantage": 2,
+    "yahoo": 4,
+    "financialdatasets": 4,
+    "polygon": 4,
+}
+
+def yahoo_period(start_date, end_date):
+    """
+    Converts a "YYYY-MM-DD" date range into a yfinance period string such as "30d".
+    """
+    if not start_date or not end_date:
+        return "7d"
+    days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days
+    return f"{max(days, 1)}d"
+
+def fetch_provider_data(provider, symbol, start_date=None, end_date=None, interval="day"):
+    """
+    Calls the fetcher for the given provider with a uniform set of arguments.
+
+    Parameters:
+    provider (str): One of the keys of PROVIDER_CONCURRENCY.
+    symbol (str): The stock ticker symbol.
+    start_date (str, optional): Start date in "YYYY-MM-DD" format.
+    end_date (str, optional): End date in "YYYY-MM-DD" format.
+    interval (str, optional): Bar size for the ranged providers, "day" or "week".
+
+    Returns:
+    dict or DataFrame: Whatever the underlying fetcher returns.
+    """
+    if provider == "alpha_vantage":
+        return fetch_alpha_vantage_data(symbol)
+    if provider == "yahoo":
+        return fetch_yahoo_data(symbol, period=yahoo_period(start_date, end_date))
+    if provider == "financialdatasets":
+        return fetch_financialdatasets_data(symbol, start_date, end_date, interval)
+    if provider == "polygon":
+        return fetch_polygon_daily_data(symbol, start_date, end_date, interval)
+    raise ValueError(f"Unknown provider: {provider}")
+
+def make_jobs(providers, symbols, start_date=None, end_date=None, interval="day"):
+    """
+    Builds one FetchJob for every (provider, symbol) pair over the same date range.
+    """
+    return [FetchJob(p, s, start_date, end_date, interval) for s in symbols for p in providers]
+
+def _batch_key(job):
+    """
+    Returns what a job must share with others to be fetched in one multi-symbol call, or None.
+    """
+    if job.provider == "yahoo" and not YAHOO_BASE_URL:
+        return ("yahoo", yahoo_period(job.start_date, job.end_date))
+    if job.provider == "polygon" and job.interval == "day" and job.start_date and job.end_date:
+        return ("polygon", job.start_date, job.end_date)
+    return None
+
+def plan_batches(jobs):
+    """
+    Groups jobs into the calls that will fetch them.
+
+    Parameters:
+    jobs (iterable): FetchJob tuples.
+
+    What the code does:
+    - Puts Yahoo Finance jobs with the same period into yf.download batches of up to YAHOO_BATCH_SIZE.
+    - Puts Polygon.io daily jobs with the same range together when the range has fewer weekdays
+      than there are symbols, so one grouped request per day beats one request per symbol.
+    - Leaves every other job, and any group of one, as a single request.
+
+    Returns:
+    list: (batch key or None, list of FetchJob) pairs, one per call.
+    """
+    groups = {}
+    calls = []
+    for job in jobs:
+        key = _batch_key(job)
+        if key is None:
+            calls.append((None, [job]))
+        else:
+            groups.setdefault(key, []).append(job)
+    for key, group in groups.items():
+        symbols = {job.symbol for job in group}
+        if key[0] == "yahoo" and len(symbols) > 1:
+            calls.extend((key, group[i:i + YAHOO_BATCH_SIZE]) for i in range(0, len(group), YAHOO_BATCH_SIZE))
+        elif key[0] == "polygon" and 0 < len(_weekdays(key[1], key[2])) < len(symbols):
+            calls.append((key, group))
+        else:
+            calls.extend((None, [job]) for job in group)
+    return calls
+
+def _run_call(key, jobs):
+    # Single and Yahoo Finance calls both return {symbol: payload}, so they are handled alike
+    if key is None:
+        return {jobs[0].symbol: fetch_provider_data(*jobs[0])}
+    return fetch_yahoo_batch([job.symbol for job in jobs], period=key[1])
+
+def fetch_many(jobs, concurrency=None):
+    """
+    Runs many fetch jobs in parallel and yields each result as soon as it finishes.
+
+    Parameters:
+    jobs (iterable): FetchJob tuples of (provider, symbol, start_date, end_date[, interval]).
+    concurrency (dict, optional): Per-provider overrides for PROVIDER_CONCURRENCY.
+
+    What the code does:
+    - Creates a separate thread pool for every provider, sized to that provider's cap.
+    - Folds jobs into multi-symbol calls where the provider has one (see plan_batches).
+    - Submits each call to its provider's pool so one slow API cannot starve the others.
+      A Polygon.io grouped batch submits one call per day, so its days share the same cap.
+    - Yields results in completion order rather than submission order. A failed batch
+      yields its error for every job in it.
+
+    Returns:
+    generator: Tuples of (job, result, error). Exactly one of result and error is None.
+    """
+    limits = dict(PROVIDER_CONCURRENCY, **(concurrency or {}))
+    pools = {}
+    futures = {}
+    # Polygon.io batch key mapped to its weekdays and the responses received so far
+    grouped = {}
+    try:
+        for key, batch in plan_batches(FetchJob(*job) for job in jobs):
+            provider = batch[0].provider
+            if provider not in pools:
+                pools[provider] = ThreadPoolExecutor(
+                    max_workers=limits.get(provider, 1),
+                    thread_name_prefix=f"fetch-{provider}"
+                )
+            if key is not None and key[0] == "polygon":
+                days = _weekdays(key[1], key[2])
+                grouped[key] = (days, {})
+                for day in days:
+                    futures[pools[provider].submit(fetch_polygon_grouped_daily, day)] = (key, day, batch)
+            else:
+                futures[pools[provider].submit(_run_call, key, batch)] = (key, None, batch)
+
+        for future in as_completed(futures):
+            key, day, batch = futures[future]
+            if day is not None:
+                if key not in grouped:
+                    # An earlier day of this batch already failed it
+                    continue
+                days, received = grouped[key]
+                try:
+                    received[day] = future.result()
+                    if len(received) < len(days):
+                        continue
+                    symbols = [job.symbol for job in batch]
+                    payloads = split_grouped_daily(symbols, key[1], key[2], [(d, received[d]) for d in days])
+                except Exception as e:
+                    del grouped[key]
+                    for job in batch:
+                        yield job, None, e
+                    continue
+                del grouped[key]
+            else:
+                try:
+                    payloads = future.result()
+                except Exception as e:
+                    for job in batch:
+                        yield job, None, e
+                    continue
+            for job in batch:
+                yield job, payloads[job.symbol], None
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from barstore import BarStore
+from data import fetch_many, make_jobs
+from normalize import COLUMNS, empty_frame, normalize
+
+# Snapshot written by the collect stage and read by the charts
+DATASET_DB = os.getenv("DATASET_DB", "dataset.db")
+
+PROVIDERS = ["alpha_vantage", "yahoo", "financialdatasets", "polygon"]
+
+SNAPSHOT_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS bars (
+        provider TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        date TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (provider, symbol, date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fetches (
+        provider TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        ok INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        error TEXT,
+        start_date TEXT,
+        end_date TEXT,
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (provider, symbol)
+    )
+    """,
+]
+
+class Dataset:
+    """
+    The bars of every (provider, symbol) pair of a snapshot, one BarStore per provider,
+    plus whether each fetch succeeded. Charts read from this and never touch the network.
+    """
+
+    def __init__(self, stores, status):
+        self.stores = stores
+        self.status = status
+
+    @property
+    def symbols(self):
+        return sorted({symbol for _, symbol in self.status})
+
+    def frame(self, provider, symbol, start_date=None, end_date=None):
+        """
+        Returns the bars of one provider and symbol as an OHLCV frame, optionally cut to a date range.
+        """
+        store = self.stores.get(provider)
+        if store is None or symbol not in store:
+            return empty_frame()
+        return store[symbol].between(start_date, end_date).to_frame()
+
+    def succeeded(self, provider, symbol):
+        """
+        Returns True if the collect stage got data for this provider and symbol.
+        """
+        return bool(self.status.get((provider, symbol)))
+
+def collect_dataset(symbols, days=90, providers=PROVIDERS, path=DATASET_DB):
+    """
+    Collect stage: fetches every provider for every symbol and writes a normalized snapshot.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    days (int): Length of the date range ending today. Default is 90, the longest any chart uses.
+    providers (list): Provider names. Default is all four.
+    path (str): SQLite file the snapshot is written to. Default is DATASET_DB.
+
+    What the code does:
+    - Fetches all (provider, symbol) pairs in parallel through data.fetch_many.
+    - Normalizes each response into an OHLCV frame.
+    - Replaces the snapshot's bars and fetch outcomes in one transaction.
+
+    Returns:
+    Dataset: The collected data, the same as load_dataset(path) would return.
+    """
+    end = datetime.now()
+    start_date = (end - timedelta(days=days)).strftime('%Y-%m-%d')
+    end_date = end.strftime('%Y-%m-%d')
+    fetched_at = end.isoformat(timespec="seconds")
+
+    frames = {provider: {} for provider in providers}
+    status = {}
+    fetch_rows = []
+    for job, data, error in fetch_many(make_jobs(providers, symbols, start_date, end_date)):
+        frame = empty_frame()
+        if error is None:
+            try:
+                # Alpha Vantage always returns the full history; keep only the window
+                frame = normalize(job.provider, data).loc[start_date:end_date]
+            except Exception as e:
+                error = e
+        key = (job.provider, job.symbol)
+        frames[job.provider][job.symbol] = frame
+        status[key] = error is None and not frame.empty
+        fetch_rows.append((
+            job.provider, job.symbol, int(status[key]), len(frame),
+            None if error is None else f"{type(error).__name__}: {error}",
+            start_date, end_date, fetched_at
+        ))
+
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            for statement in SNAPSHOT_SCHEMA:
+                conn.execute(statement)
+            conn.execute("DELETE FROM bars")
+            conn.execute("DELETE FROM fetches")
+            conn.executemany("INSERT INTO fetches VALUES (?, ?, ?, ?, ?, ?, ?, ?)", fetch_rows)
+            for provider, by_symbol in frames.items():
+                for symbol, frame in by_symbol.items():
+                    dates = frame.index.strftime('%Y-%m-%d')
+                    conn.executemany(
+                        "INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        zip([provider] * len(frame), [symbol] * len(frame), dates,
+                            *(frame[c].tolist() for c in COLUMNS))
+                    )
+    finally:
+        conn.close()
+    return Dataset({p: BarStore.from_frames(by_symbol) for p, by_symbol in frames.items()}, status)
+
+def load_dataset(path=DATASET_DB):
+    """
+    Reads a snapshot written by collect_dataset.
+
+    Parameters:
+    path (str): The snapshot file. Default is DATASET_DB.
+
+    What the code does:
+    - Reads each provider's bars with one query, walking the (provider, symbol, date) primary key in order.
+    - Packs them straight into a BarStore per provider; no per-symbol DataFrame is built until a chart asks.
+
+    Returns:
+    Dataset: The snapshot's bars and fetch outcomes.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No dataset snapshot at {path}; run collect_dataset first")
+    conn = sqlite3.connect(path)
+    try:
+        status = {(p, s): bool(ok) for p, s, ok in conn.execute("SELECT provider, symbol, ok FROM fetches")}
+        stores = {}
+        for (provider,) in conn.execute("SELECT DISTINCT provider FROM fetches").fetchall():
+            count = conn.execute("SELECT COUNT(*) FROM bars WHERE provider = ?", (provider,)).fetchone()[0]
+            cur = conn.execute(
+                "SELECT symbol, date, open, high, low, close, volume FROM bars WHERE provider = ? ORDER BY symbol, date",
+                (provider,)
+            )
+            stores[provider] = BarStore.from_rows(cur, count)
+    finally:
+        conn.close()
+    return Dataset(stores, status)
+
+if __name__ == "__main__":
+    dataset = collect_dataset(["AAPL", "TSLA", "MSFT", "GOOGL"])
+    ok = sum(dataset.status.values())
+    print(f"Collected {ok}/{len(dataset.status)} provider-symbol pairs into {DATASET_DB}")
@@ -0,0 +1,251 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from db_setup import DB_NAME, migrate
+from lazy import lazy_import
+from metrics import registry
+
+asyncio = lazy_import("asyncio")
+
+# Read connections kept open per database. SQLite releases the GIL while it steps through
+# a query, so readers on separate connections run on separate cores.
+READ_POOL_SIZE = int(os.getenv("READ_POOL_SIZE", str(min(8, os.cpu_count() or 1))))
+
+# Shared cache lets the pool's connections share one page cache, at the price of table-level
+# locks between them. Off by default: under WAL, private caches read in parallel.
+READ_SHARED_CACHE = os.getenv("READ_SHARED_CACHE", "0") == "1"
+
+# Compiled statements each connection keeps, so the helpers below are prepared once per connection
+STATEMENT_CACHE_SIZE = 256
+
+#### READ-ONLY CONNECTION POOL: ####
+
+def prepare_database(db_name=DB_NAME):
+    """
+    Makes a database ready for read-only connections.
+
+    What the code does:
+    - Applies any pending migrations, which a read-only connection could not do.
+    - Switches the database to write-ahead logging. The setting is stored in the file, so
+      readers never block the ingest writer and the writer never blocks them.
+    """
+    conn = sqlite3.connect(db_name)
+    try:
+        migrate(conn)
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+class ReadPool:
+    """
+    A fixed set of read-only connections to one database, lent to one caller at a time.
+
+    Connections are opened with mode=ro and PRAGMA query_only, so nothing read through the
+    pool can take a write lock. Callers pass a function that takes the connection:
+
+        pool = get_read_pool()
+        rows = pool.execute(read_symbol_range, "AAPL", "2024-01-01")
+        rows = await pool.run(read_symbol_range, "AAPL", "2024-01-01")
+    """
+
+    def __init__(self, db_name=DB_NAME, size=READ_POOL_SIZE, shared_cache=READ_SHARED_CACHE, timeout=30):
+        self.db_name = db_name
+        self.size = size
+        self.shared_cache = shared_cache
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        prepare_database(db_name)
+
+    def _connect(self):
+        uri = Path(self.db_name).resolve().as_uri() + "?mode=ro"
+        if self.shared_cache:
+            uri += "&cache=shared"
+        conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA cache_size=-16384")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        # Reuse an idle connection, open a new one while under the size, otherwise wait
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Read pool for {self.db_name} is closed")
+            if self._opened < self.size:
+                self._opened += 1
+                opening = True
+            else:
+                opening = False
+        if opening:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No read connection to {self.db_name} freed up within {self.timeout}s") from None
+        registry.observe("read_pool_wait_seconds", time.perf_counter() - start)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Lends out a connection for the duration of a with block.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            # End any read transaction left open so the WAL can be checkpointed past it
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def execute(self, fn, *args, **kwargs):
+        """
+        Calls fn(connection, *args, **kwargs) with a pooled connection and returns its result.
+        """
+        with self.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Awaitable execute(). The query runs in a worker thread, so the event loop stays free
+        and up to `size` queries proceed at the same time.
+        """
+        return await asyncio.to_thread(self.execute, fn, *args, **kwargs)
+
+    async def gather(self, *calls):
+        """
+        Runs several (fn, *args) calls concurrently and returns their results in order.
+        """
+        return await asyncio.gather(*(self.run(fn, *args) for fn, *args in calls))
+
+    def close(self):
+        """
+        Closes the idle connections. Connections still lent out are closed when they come back.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_read_pool(db_name=DB_NAME):
+    """
+    Returns the process-wide read pool for a database, creating it on first use.
+    """
+    key = os.path.abspath(db_name)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ReadPool(db_name)
+        return _pools[key]
+
+def close_read_pools():
+    """
+    Closes every pool made by get_read_pool.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+#### PREPARED READS: ####
+
+# The SQL text of each helper is fixed, so every connection compiles it once and reuses it
+WEEKLY_RANGE_SQL = """
+    SELECT date, open, high, low, close, volume
+    FROM weekly_data
+    WHERE stock_id = (SELECT id FROM stocks WHERE symbol = ?) AND date BETWEEN ? AND ?
+    ORDER BY date
+"""
+
+DAILY_RANGE_SQL = """
+    SELECT date, open, high, low, close, volume
+    FROM daily_bars
+    WHERE stock_id = (SELECT id FROM stocks WHERE symbol = ?)
+      AND provider_id = (SELECT id FROM providers WHERE name = ?)
+      AND date BETWEEN ? AND ?
+    ORDER BY date
+"""
+
+WEEKLY_AGGREGATE_SQL = """
+    SELECT COUNT(*), AVG(close), MIN(low), MAX(high), SUM(volume), MIN(date), MAX(date)
+    FROM weekly_data
+    WHERE stock_id = (SELECT id FROM stocks WHERE symbol = ?) AND date BETWEEN ? AND ?
+"""
+
+DAILY_AGGREGATE_SQL = """
+    SELECT COUNT(*), AVG(close), MIN(low), MAX(high), SUM(volume), MIN(date), MAX(date)
+    FROM daily_bars
+    WHERE stock_id = (SELECT id FROM stocks WHERE symbol = ?)
+      AND provider_id = (SELECT id FROM providers WHERE name = ?)
+      AND date BETWEEN ? AND ?
+"""
+
+# Open bounds are passed as dates no bar can fall outside of, so the SQL never changes
+_MIN_DATE = "0000-00-00"
+_MAX_DATE = "9999-99-99"
+
+def _range_params(symbol, provider, start_date, end_date):
+    bounds = (start_date or _MIN_DATE, end_date or _MAX_DATE)
+    return (symbol, *bounds) if provider is None else (symbol, provider, *bounds)
+
+def read_symbol_range(conn, symbol, start_date=None, end_date=None, provider=None):
+    """
+    Reads one symbol's bars between two dates.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection, e.g. from ReadPool.
+    symbol (str): The stock ticker symbol.
+    start_date (str, optional): First "YYYY-MM-DD" date to include. Default is the earliest.
+    end_date (str, optional): Last "YYYY-MM-DD" date to include. Default is the latest.
+    provider (str, optional): A provider name to read from 'daily_bars'. None reads 'weekly_data'.
+
+    What the code does:
+    - Seeks straight to the symbol's range on the (stock_id, date) unique index or the
+      daily_bars primary key, so the cost does not grow with other symbols' history.
+
+    Returns:
+    list: Tuples of (date, open, high, low, close, volume), oldest first.
+    """
+    sql = WEEKLY_RANGE_SQL if provider is None else DAILY_RANGE_SQL
+    return conn.execute(sql, _range_params(symbol, provider, start_date, end_date)).fetchall()
+
+def read_symbol_aggregate(conn, symbol, start_date=None, end_date=None, provider=None):
+    """
+    Summarizes one symbol's bars between two dates. Arguments are as for read_symbol_range.
+
+    Returns:
+    dict: count, avg_close, low, high, volume, first_date and last_date. The values are None
+    when there are no bars in the range.
+    """
+    sql = WEEKLY_AGGREGATE_SQL if provider is None else DAILY_AGGREGATE_SQL
+    row = conn.execute(sql, _range_params(symbol, provider, start_date, end_date)).fetchone()
+    keys = ["count", "avg_close", "low", "high", "volume", "first_date", "last_date"]
+    return dict(zip(keys, row))
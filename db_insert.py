@@ -1,13 +1,658 @@
 # db_insert.py
+import argparse
 import sqlite3
-from data import fetch_alpha_vantage_data
+from datetime import datetime, timedelta
+from itertools import islice, takewhile
+from data import fetch_alpha_vantage_data, fetch_many, make_jobs
+from db_setup import DB_NAME, migrate
+from metrics import instrument, registry
+from normalize import (
+    normalize,
+    normalize_financialdatasets,
+    normalize_polygon,
+    to_rows,
+    week_ending
+)
+from streaming import stream_records, week_ending_record
 
-DB_NAME = "stocks.db"
+# Most new weeks stored per symbol on each run
+MAX_WEEKS = 25
 
+# Symbols written per transaction by bulk_insert_weekly
+BATCH_SIZE = 200
+
+# SQLite caps the number of bound parameters per statement
+MAX_SQL_VARIABLES = 900
+
+# Rows handed to one executemany call by the streaming writers
+STREAM_BATCH_ROWS = 1000
+
+# How far back the first incremental sync of a symbol reaches for ranged providers
+DEFAULT_HISTORY_DAYS = 2 * 365
+
+# Upserts shared by the batch and streaming writers
+WEEKLY_UPSERT_SQL = """
+    INSERT INTO weekly_data (stock_id, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(stock_id, date) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+"""
+
+# weekly_data holds Alpha Vantage's series only; other providers' weekly bars go to weekly_bars
+WEEKLY_BARS_UPSERT_SQL = """
+    INSERT INTO weekly_bars (stock_id, provider_id, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(stock_id, provider_id, date) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+"""
+
+DAILY_UPSERT_SQL = """
+    INSERT INTO daily_bars (stock_id, provider_id, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(stock_id, provider_id, date) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+"""
+
+def get_connection(db_name=DB_NAME):
+    """
+    Opens a connection tuned for bulk writes.
+
+    Parameters:
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+
+    What the code does:
+    - Switches the database to write-ahead logging so readers do not block the writer.
+    - Relaxes fsyncs to once per checkpoint (synchronous=NORMAL), which is still safe under WAL.
+    - Enlarges the page cache and keeps temporary tables in memory.
+    - Applies any pending migrations, so every writer sees the current schema.
+
+    Returns:
+    sqlite3.Connection: The open connection.
+    """
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    migrate(conn)
+    return conn
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def parse_alpha_weekly(data):
+    """
+    Turns an Alpha Vantage TIME_SERIES_WEEKLY response into row tuples.
+
+    Parameters:
+    data (dict): The JSON response from fetch_alpha_vantage_data.
+
+    What the code does:
+    - Reads the series with plain Python, so a single-symbol Alpha Vantage ingest never imports pandas.
+
+    Returns:
+    list: Tuples of (date, open, high, low, close, volume), newest week first.
+
+    Raises:
+    KeyError: If the response has no "Weekly Time Series", e.g. a rate-limit "Note" or an
+        "Error Message". Such a response must not be mistaken for a symbol with no weeks.
+    """
+    if not isinstance(data, dict) or "Weekly Time Series" not in data:
+        detail = (data.get("Note") or data.get("Error Message") or data.get("Information")) if isinstance(data, dict) else data
+        raise KeyError(f"No 'Weekly Time Series' in Alpha Vantage response: {detail}")
+    rows = [
+        (day, float(bar["1. open"]), float(bar["2. high"]), float(bar["3. low"]),
+         float(bar["4. close"]), int(float(bar["5. volume"])))
+        for day, bar in data["Weekly Time Series"].items()
+    ]
+    rows.sort(reverse=True)
+    return rows
+
+def parse_polygon_weekly(data):
+    """
+    Turns a Polygon.io weekly aggregates response into row tuples dated by the Friday ending each week.
+    """
+    return to_rows(week_ending(normalize_polygon(data)), newest_first=True)
+
+def parse_financialdatasets_weekly(data):
+    """
+    Turns a FinancialDatasets.ai weekly prices response into row tuples dated by the Friday ending each week.
+    """
+    return to_rows(week_ending(normalize_financialdatasets(data)), newest_first=True)
+
+# Weekly parsers for every provider sync_weekly_data can pull from
+WEEKLY_PARSERS = {
+    "alpha_vantage": parse_alpha_weekly,
+    "polygon": parse_polygon_weekly,
+    "financialdatasets": parse_financialdatasets_weekly,
+}
+
+def resolve_stock_ids(conn, symbols):
+    """
+    Makes sure every symbol has a row in 'stocks' and returns their ids.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    symbols (list): Stock ticker symbols.
+
+    What the code does:
+    - Inserts any missing symbols with a single executemany.
+    - Looks the ids up with one IN query per chunk of symbols.
+
+    Returns:
+    dict: A mapping of symbol to stock_id.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    conn.executemany("INSERT OR IGNORE INTO stocks (symbol) VALUES (?)", [(s,) for s in symbols])
+    ids = {}
+    for chunk in _chunks(symbols, MAX_SQL_VARIABLES):
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"SELECT symbol, id FROM stocks WHERE symbol IN ({placeholders})", chunk)
+        ids.update(cur.fetchall())
+    return ids
+
+def _existing_dates(conn, stock_ids):
+    existing = {stock_id: set() for stock_id in stock_ids}
+    for chunk in _chunks(list(stock_ids), MAX_SQL_VARIABLES):
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"SELECT stock_id, date FROM weekly_data WHERE stock_id IN ({placeholders})", chunk)
+        for stock_id, date in cur:
+            existing[stock_id].add(date)
+    return existing
+
+def bulk_insert_weekly(conn, series_by_symbol, limit=MAX_WEEKS, batch_size=BATCH_SIZE):
+    """
+    Writes parsed weekly series for many symbols in a few large transactions.
+
+    Parameters:
+    conn (sqlite3.Connection): An open connection, ideally from get_connection.
+    series_by_symbol (dict): Symbol mapped to rows from parse_alpha_weekly.
+    limit (int): Most new weeks stored per symbol. Default is MAX_WEEKS.
+    batch_size (int): Symbols written per transaction. Default is BATCH_SIZE.
+
+    What the code does:
+    - Resolves all stock ids up front.
+    - For each batch, reads the dates already stored, keeps up to `limit` new weeks per
+      symbol and writes them with one executemany inside a single transaction.
+
+    Returns:
+    dict: A mapping of symbol to the number of rows inserted.
+    """
+    with conn:
+        stock_ids = resolve_stock_ids(conn, series_by_symbol)
+
+    counts = {}
+    for batch in _chunks(list(series_by_symbol), batch_size):
+        existing = _existing_dates(conn, [stock_ids[s] for s in batch])
+        rows = []
+        for symbol in batch:
+            stock_id = stock_ids[symbol]
+            new_rows = [r for r in series_by_symbol[symbol] if r[0] not in existing[stock_id]][:limit]
+            rows.extend((stock_id,) + r for r in new_rows)
+            counts[symbol] = len(new_rows)
+        with conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO weekly_data
+                (stock_id, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        registry.inc("rows_written_total", len(rows), table="weekly_data")
+    return counts
+
+def weekly_provider_id(conn, provider):
+    """
+    Returns the provider id that keys a provider's weekly bars, or None for Alpha Vantage.
+
+    What the code does:
+    - Alpha Vantage's weekly series lives in 'weekly_data', which has no provider column and
+      which the rollups, process_data and retention read as Alpha Vantage data.
+    - Every other provider's weekly bars go to 'weekly_bars' under their own provider_id, so
+      two providers never overwrite each other's week.
+    """
+    return None if provider == "alpha_vantage" else provider_ids(conn)[provider]
+
+def _weekly_target(provider_id):
+    # Table, upsert, row key columns and their values for weekly_data or one provider's weekly_bars
+    if provider_id is None:
+        return "weekly_data", WEEKLY_UPSERT_SQL, "stock_id = ?", ()
+    return "weekly_bars", WEEKLY_BARS_UPSERT_SQL, "stock_id = ? AND provider_id = ?", (provider_id,)
+
+def latest_weekly_dates(conn, stock_ids, provider_id=None):
+    """
+    Returns the most recent stored week for each stock.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    stock_ids (list): Ids from the 'stocks' table.
+    provider_id (int, optional): Read this provider's 'weekly_bars' (see weekly_provider_id).
+        Default None reads 'weekly_data'.
+
+    What the code does:
+    - Runs one query with a correlated MAX(date) per stock. Each MAX is answered from the
+      UNIQUE(stock_id, date) index or the weekly_bars primary key with a single seek rather
+      than by reading the symbol's history.
+
+    Returns:
+    dict: A mapping of stock_id to its latest date, or None if nothing is stored yet.
+    """
+    table, _, key_sql, key_params = _weekly_target(provider_id)
+    # The stock id comes from the outer row; only the provider id, if any, is bound
+    key_sql = key_sql.replace("stock_id = ?", f"{table}.stock_id = stocks.id")
+    latest = {}
+    for chunk in _chunks(list(stock_ids), MAX_SQL_VARIABLES):
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"""
+            SELECT stocks.id,
+                   (SELECT MAX(date) FROM {table} WHERE {key_sql})
+            FROM stocks
+            WHERE stocks.id IN ({placeholders})
+        """, [*key_params] + chunk)
+        latest.update(cur.fetchall())
+    return latest
+
+def sync_cutoff(latest):
+    """
+    Returns the date an incremental weekly sync resumes from, or None with nothing stored.
+
+    The latest stored week may have been a partial week (Alpha Vantage dates the current
+    week by its last trading day so far), so the sync restarts from that week's Monday.
+    """
+    if latest is None:
+        return None
+    day = datetime.strptime(latest, '%Y-%m-%d')
+    return (day - timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+
+def upsert_weekly_delta(conn, deltas, provider_id=None):
+    """
+    Writes the new weeks for many symbols in one transaction.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    deltas (dict): stock_id mapped to (cutoff, rows). Rows dated on or after the cutoff replace
+        whatever is stored from the cutoff onwards; older stored rows are left untouched.
+        An empty rows list leaves the stored weeks as they are.
+    provider_id (int, optional): Write this provider's 'weekly_bars' (see weekly_provider_id).
+        Default None writes 'weekly_data'.
+
+    Returns:
+    int: The number of rows written.
+    """
+    table, sql, key_sql, key_params = _weekly_target(provider_id)
+    written = 0
+    with conn:
+        for stock_id, (cutoff, rows) in deltas.items():
+            key = (stock_id, *key_params)
+            # With nothing fetched there is nothing to replace the stored weeks with
+            if cutoff is not None and rows:
+                dates = [r[0] for r in rows]
+                placeholders = ",".join("?" * len(dates))
+                conn.execute(
+                    f"DELETE FROM {table} WHERE {key_sql} AND date >= ? AND date NOT IN ({placeholders})",
+                    [*key, cutoff] + dates
+                )
+            conn.executemany(sql, [key + r for r in rows])
+            written += len(rows)
+    registry.inc("rows_written_total", written, table=table)
+    return written
+
+@instrument("insert.sync_weekly")
+def sync_weekly_data(symbols, provider="alpha_vantage", db_name=DB_NAME, batch_size=BATCH_SIZE):
+    """
+    Brings a provider's weekly bars up to date by fetching and writing only the weeks that are missing.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    provider (str): "alpha_vantage", "polygon" or "financialdatasets". Default is "alpha_vantage".
+        Alpha Vantage is stored in 'weekly_data' and the others in 'weekly_bars'.
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    batch_size (int): Symbols written per transaction. Default is BATCH_SIZE.
+
+    What the code does:
+    - Looks up the latest stored week of every symbol with latest_weekly_dates.
+    - Asks Polygon.io and FinancialDatasets.ai only for weekly bars from that week onwards.
+      Alpha Vantage always returns the full series, so its response is trimmed to the same range.
+    - Upserts the delta with upsert_weekly_delta, one transaction per batch.
+
+    Returns:
+    dict: A mapping of symbol to the number of rows written.
+    """
+    parse = WEEKLY_PARSERS[provider]
+    conn = get_connection(db_name)
+    try:
+        with conn:
+            stock_ids = resolve_stock_ids(conn, symbols)
+        provider_id = weekly_provider_id(conn, provider)
+        latest = latest_weekly_dates(conn, stock_ids.values(), provider_id)
+
+        today = datetime.now()
+        default_start = (today - timedelta(days=DEFAULT_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        end = today.strftime('%Y-%m-%d')
+        cutoffs = {s: sync_cutoff(latest.get(stock_ids[s])) for s in stock_ids}
+        jobs = [(provider, s, cutoffs[s] or default_start, end, "week") for s in stock_ids]
+
+        counts = {}
+        deltas = {}
+        for job, data, error in fetch_many(jobs):
+            if error is not None:
+                print(f"Error fetching data for {job.symbol}: {error}")
+                continue
+            try:
+                rows = parse(data)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"Error parsing data for {job.symbol}: {e}")
+                continue
+            cutoff = cutoffs[job.symbol]
+            if cutoff is not None:
+                rows = [r for r in rows if r[0] >= cutoff]
+            elif provider == "alpha_vantage":
+                rows = rows[:MAX_WEEKS]
+            deltas[stock_ids[job.symbol]] = (cutoff, rows)
+            counts[job.symbol] = len(rows)
+            if len(deltas) >= batch_size:
+                upsert_weekly_delta(conn, deltas, provider_id)
+                deltas = {}
+        if deltas:
+            upsert_weekly_delta(conn, deltas, provider_id)
+    finally:
+        conn.close()
+    return counts
+
+#### DAILY BARS: ####
+
+def parse_daily(provider, data):
+    """
+    Turns any daily provider's response into (date, open, high, low, close, volume) tuples, oldest first.
+    """
+    return to_rows(normalize(provider, data))
+
+# Providers that serve daily bars
+DAILY_PROVIDERS = ("yahoo", "polygon", "financialdatasets")
+
+def provider_ids(conn):
+    """
+    Returns a mapping of provider name to its id in the 'providers' table.
+    """
+    return dict(conn.execute("SELECT name, id FROM providers"))
+
+def latest_daily_dates(conn, provider_id, stock_ids):
+    """
+    Returns the most recent stored daily bar of one provider for each stock.
+    Each MAX(date) is a single seek on the (stock_id, provider_id, date) primary key.
+    """
+    latest = {}
+    for chunk in _chunks(list(stock_ids), MAX_SQL_VARIABLES):
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(f"""
+            SELECT stocks.id,
+                   (SELECT MAX(date) FROM daily_bars
+                    WHERE daily_bars.stock_id = stocks.id AND daily_bars.provider_id = ?)
+            FROM stocks
+            WHERE stocks.id IN ({placeholders})
+        """, [provider_id] + chunk)
+        latest.update(cur.fetchall())
+    return latest
+
+def upsert_daily_bars(conn, provider_id, rows_by_stock):
+    """
+    Writes daily bars for many stocks of one provider in a single transaction.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    provider_id (int): Id from the 'providers' table.
+    rows_by_stock (dict): stock_id mapped to (date, open, high, low, close, volume) tuples.
+
+    Returns:
+    int: The number of rows written.
+    """
+    rows = [
+        (stock_id, provider_id) + tuple(r)
+        for stock_id, stock_rows in rows_by_stock.items()
+        for r in stock_rows
+    ]
+    with conn:
+        conn.executemany(DAILY_UPSERT_SQL, rows)
+    registry.inc("rows_written_total", len(rows), table="daily_bars")
+    return len(rows)
+
+@instrument("insert.sync_daily")
+def sync_daily_bars(symbols, providers=DAILY_PROVIDERS, db_name=DB_NAME, batch_size=BATCH_SIZE):
+    """
+    Stores daily bars from Yahoo Finance, Polygon.io and FinancialDatasets.ai, fetching only
+    the days after each (symbol, provider)'s latest stored bar.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    providers (iterable): Names from DAILY_PROVIDERS. Default is all of them.
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    batch_size (int): Symbols written per transaction. Default is BATCH_SIZE.
+
+    Returns:
+    dict: A mapping of (provider, symbol) to the number of rows written.
+    """
+    conn = get_connection(db_name)
+    try:
+        with conn:
+            stock_ids = resolve_stock_ids(conn, symbols)
+        ids = provider_ids(conn)
+
+        today = datetime.now()
+        default_start = (today - timedelta(days=DEFAULT_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        end = today.strftime('%Y-%m-%d')
+        jobs = []
+        for provider in providers:
+            latest = latest_daily_dates(conn, ids[provider], stock_ids.values())
+            for symbol, stock_id in stock_ids.items():
+                # Re-fetch the latest stored day in case it was written before the close
+                jobs.append((provider, symbol, latest.get(stock_id) or default_start, end))
+
+        counts = {}
+        pending = {}
+        for job, data, error in fetch_many(jobs):
+            if error is not None:
+                print(f"Error fetching {job.provider} data for {job.symbol}: {error}")
+                continue
+            try:
+                rows = parse_daily(job.provider, data)
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"Error parsing {job.provider} data for {job.symbol}: {e}")
+                continue
+            # Yahoo Finance only takes a period, so drop anything before the requested start
+            rows = [r for r in rows if r[0] >= job.start_date]
+            pending.setdefault(job.provider, {})[stock_ids[job.symbol]] = rows
+            counts[(job.provider, job.symbol)] = len(rows)
+            if len(pending[job.provider]) >= batch_size:
+                upsert_daily_bars(conn, ids[job.provider], pending.pop(job.provider))
+        for provider, rows_by_stock in pending.items():
+            upsert_daily_bars(conn, ids[provider], rows_by_stock)
+    finally:
+        conn.close()
+    return counts
+
+#### STREAMING INGEST: ####
+
+def write_stream(conn, sql, key, records, batch_rows=STREAM_BATCH_ROWS):
+    """
+    Writes a stream of bar records in fixed-size executemany batches.
+
+    Parameters:
+    conn (sqlite3.Connection): An open connection, already inside a transaction.
+    sql (str): WEEKLY_UPSERT_SQL, WEEKLY_BARS_UPSERT_SQL or DAILY_UPSERT_SQL.
+    key (tuple): Leading values of every row, e.g. (stock_id,) or (stock_id, provider_id).
+    records (iterable): (date, open, high, low, close, volume) tuples.
+    batch_rows (int): Rows per executemany call. Default is STREAM_BATCH_ROWS.
+
+    Returns:
+    list: The dates written, in the order they arrived.
+    """
+    dates = []
+    records = iter(records)
+    while True:
+        batch = [key + tuple(r) for r in islice(records, batch_rows)]
+        if not batch:
+            return dates
+        conn.executemany(sql, batch)
+        dates.extend(row[len(key)] for row in batch)
+
+@instrument("insert.stream_weekly")
+def stream_weekly_data(symbols, provider="alpha_vantage", db_name=DB_NAME, limit=MAX_WEEKS,
+                       batch_rows=STREAM_BATCH_ROWS):
+    """
+    Streaming counterpart of sync_weekly_data: bars are written while the response downloads.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    provider (str): "alpha_vantage", "polygon" or "financialdatasets". Default is "alpha_vantage".
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    limit (int, optional): Most weeks stored for a symbol with no history yet. None keeps the
+        full series. Default is MAX_WEEKS.
+    batch_rows (int): Rows per executemany call. Default is STREAM_BATCH_ROWS.
+
+    What the code does:
+    - Works out each symbol's resync cutoff the same way sync_weekly_data does.
+    - Feeds the streamed records straight into write_stream, one transaction per symbol.
+    - Alpha Vantage sends newest weeks first, so the stream is cut at the cutoff or after
+      `limit` weeks and the rest of the body is never downloaded.
+    - Memory per symbol is one chunk of the response plus one batch of rows.
+
+    Returns:
+    dict: A mapping of symbol to the number of rows written.
+    """
+    conn = get_connection(db_name)
+    try:
+        with conn:
+            stock_ids = resolve_stock_ids(conn, symbols)
+        provider_id = weekly_provider_id(conn, provider)
+        table, sql, key_sql, key_params = _weekly_target(provider_id)
+        latest = latest_weekly_dates(conn, stock_ids.values(), provider_id)
+        today = datetime.now()
+        default_start = (today - timedelta(days=DEFAULT_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        end = today.strftime('%Y-%m-%d')
+
+        counts = {}
+        for symbol, stock_id in stock_ids.items():
+            cutoff = sync_cutoff(latest.get(stock_id))
+            stream = records = stream_records(provider, symbol, cutoff or default_start, end, "week")
+            if provider == "alpha_vantage":
+                if cutoff is not None:
+                    records = takewhile(lambda r: r[0] >= cutoff, records)
+                elif limit is not None:
+                    records = islice(records, limit)
+            else:
+                records = map(week_ending_record, records)
+            try:
+                with conn:
+                    dates = write_stream(conn, sql, (stock_id, *key_params), records, batch_rows)
+                    registry.inc("rows_written_total", len(dates), table=table)
+                    if cutoff is not None and dates:
+                        # Drop a stored partial week that the provider now dates differently
+                        placeholders = ",".join("?" * len(dates))
+                        conn.execute(
+                            f"DELETE FROM {table} WHERE {key_sql} AND date >= ? AND date NOT IN ({placeholders})",
+                            [stock_id, *key_params, cutoff] + dates
+                        )
+            except Exception as e:
+                print(f"Error streaming data for {symbol}: {e}")
+                continue
+            finally:
+                # Closes the connection even when the stream was cut short
+                stream.close()
+            counts[symbol] = len(dates)
+    finally:
+        conn.close()
+    return counts
+
+@instrument("insert.stream_daily")
+def stream_daily_bars(symbols, providers=("polygon", "financialdatasets"), db_name=DB_NAME,
+                      batch_rows=STREAM_BATCH_ROWS):
+    """
+    Streaming counterpart of sync_daily_bars for the providers that answer with JSON.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    providers (iterable): "polygon" and/or "financialdatasets". Default is both.
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    batch_rows (int): Rows per executemany call. Default is STREAM_BATCH_ROWS.
+
+    Returns:
+    dict: A mapping of (provider, symbol) to the number of rows written.
+    """
+    conn = get_connection(db_name)
+    try:
+        with conn:
+            stock_ids = resolve_stock_ids(conn, symbols)
+        ids = provider_ids(conn)
+        today = datetime.now()
+        default_start = (today - timedelta(days=DEFAULT_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        end = today.strftime('%Y-%m-%d')
+
+        counts = {}
+        for provider in providers:
+            latest = latest_daily_dates(conn, ids[provider], stock_ids.values())
+            for symbol, stock_id in stock_ids.items():
+                records = stream_records(provider, symbol, latest.get(stock_id) or default_start, end)
+                try:
+                    with conn:
+                        dates = write_stream(conn, DAILY_UPSERT_SQL, (stock_id, ids[provider]), records, batch_rows)
+                        registry.inc("rows_written_total", len(dates), table="daily_bars")
+                except Exception as e:
+                    print(f"Error streaming {provider} data for {symbol}: {e}")
+                    continue
+                finally:
+                    records.close()
+                counts[(provider, symbol)] = len(dates)
+    finally:
+        conn.close()
+    return counts
+
+@instrument("insert.alpha_weekly_many")
+def insert_alpha_weekly_many(symbols, db_name=DB_NAME):
+    """
+    Fetches weekly data for many symbols in parallel and bulk-inserts it.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+
+    Returns:
+    dict: A mapping of symbol to the number of rows inserted.
+    """
+    series = {}
+    for job, data, error in fetch_many(make_jobs(["alpha_vantage"], symbols)):
+        if error is not None:
+            print(f"Error fetching data for {job.symbol}: {error}")
+            continue
+        try:
+            series[job.symbol] = parse_alpha_weekly(data)
+        except (KeyError, ValueError) as e:
+            print(f"Error parsing data for {job.symbol}: {e}")
+
+    conn = get_connection(db_name)
+    try:
+        counts = bulk_insert_weekly(conn, series)
+    finally:
+        conn.close()
+    for symbol, count in counts.items():
+        print(f"Inserted {count} records for {symbol}")
+    return counts
+
+@instrument("insert.alpha_weekly")
 def insert_alpha_weekly_data(symbol):
     """
     Fetches weekly stock data for a given symbol using Alpha Vantage
-    and inserts the 10 most recent weeks of data into the database.
+    and inserts up to 25 of the most recent weeks not yet stored into the database.
 
     Parameters:
     symbol (str): The stock ticker symbol (e.g., "AAPL").
@@ -16,53 +661,47 @@ def insert_alpha_weekly_data(symbol):
     - Connects to the SQLite database (stocks.db).
     - Inserts the symbol into the 'stocks' table.
     - Fetches data from Alpha Vantage.
-    - Extracts and inserts up to 10 weeks of data into the 'weekly_data' table.
+    - Inserts up to 25 new weeks into the 'weekly_data' table through bulk_insert_weekly.
     - Each entry includes open, high, low, close, volume, and date.
 
     Returns:
     None: This function does not return any value. It modifies the database by inserting data.
     """
-    
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("INSERT OR IGNORE INTO stocks (symbol) VALUES (?)", (symbol,))
-    conn.commit()
-    cur.execute("SELECT id FROM stocks WHERE symbol = ?", (symbol,))
-    stock_id = cur.fetchone()[0]
+
     data = fetch_alpha_vantage_data(symbol)
-    weekly_data = data.get("Weekly Time Series", {})
-    
-    # Fetch existing dates to avoid duplicates
-    cur.execute("SELECT date FROM weekly_data WHERE stock_id = ?", (stock_id,))
-    existing_dates = set(row[0] for row in cur.fetchall())
-    
-    count = 0
-    for date, values in sorted(weekly_data.items(), reverse=True):
-        if count >= 25:
-            break
-        if date in existing_dates:
-            continue
-        try:
-            cur.execute("""
-                INSERT OR IGNORE INTO weekly_data
-                (stock_id, date, open, high, low, close, volume)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                stock_id,
-                date,
-                float(values["1. open"]),
-                float(values["2. high"]),
-                float(values["3. low"]),
-                float(values["4. close"]),
-                int(values["5. volume"])
-            ))
-            count += 1
-        except Exception as e:
-            print(f"Error inserting data for {symbol} on {date}: {e}")
-    conn.commit()
-    conn.close()
+    try:
+        rows = parse_alpha_weekly(data)
+    except (KeyError, ValueError) as e:
+        print(f"Error parsing data for {symbol}: {e}")
+        return
+    conn = get_connection()
+    try:
+        count = bulk_insert_weekly(conn, {symbol: rows})[symbol]
+    finally:
+        conn.close()
     print(f"Inserted {count} records for {symbol}")
 
 if __name__ == "__main__":
-    for symbol in ["AAPL", "MSFT", "GOOGL", "TSLA"]:
-        insert_alpha_weekly_data(symbol)
+    parser = argparse.ArgumentParser(description="Load weekly stock data into stocks.db")
+    parser.add_argument("symbols", nargs="*", default=["AAPL", "MSFT", "GOOGL", "TSLA"])
+    parser.add_argument("--sync", action="store_true", help="only fetch and write the weeks that are missing")
+    parser.add_argument("--provider", default="alpha_vantage", choices=sorted(WEEKLY_PARSERS))
+    parser.add_argument("--daily", action="store_true", help="also sync daily bars from every daily provider")
+    parser.add_argument("--stream", action="store_true", help="parse and write bars while the responses download")
+    args = parser.parse_args()
+
+    if args.stream:
+        for symbol, count in stream_weekly_data(args.symbols, args.provider).items():
+            print(f"Streamed {count} records for {symbol}")
+        if args.daily:
+            for (provider, symbol), count in stream_daily_bars(args.symbols).items():
+                print(f"Streamed {count} {provider} daily bars for {symbol}")
+    else:
+        if args.daily:
+            for (provider, symbol), count in sync_daily_bars(args.symbols).items():
+                print(f"Synced {count} {provider} daily bars for {symbol}")
+        if args.sync:
+            for symbol, count in sync_weekly_data(args.symbols, args.provider).items():
+                print(f"Synced {count} records for {symbol}")
+        else:
+            insert_alpha_weekly_many(args.symbols)
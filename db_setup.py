@@ -1,29 +1,24 @@
+import os
 import sqlite3
+from rollups import ROLLUP_SCHEMA
 
-def setup_database():
-     """
-    Initializes the SQLite database by creating necessary tables if they do not exist.
+DB_NAME = os.getenv("STOCKS_DB", "stocks.db")
 
-    Parameters: None
+# Provider names as used by data.fetch_many, stored once in the 'providers' table
+PROVIDERS = ["alpha_vantage", "yahoo", "financialdatasets", "polygon"]
 
-    What the code does:
-    - Connects to a database named 'stocks.db'.
-    - Creates the 'stocks' table with 'id' and 'symbol'.
-    - Creates the 'weekly_data' table with stock metrics and a foreign key reference to 'stocks'.
-
-    Returns:
-    None: This function does not return any value. 
-    """
-    
-    conn = sqlite3.connect("stocks.db")
-    cur = conn.cursor()
-    cur.execute("""
+# Schema migrations, applied in order. PRAGMA user_version records how many have run,
+# so a database created by an older version of this script is upgraded in place.
+MIGRATIONS = [
+    # 1: the original schema
+    [
+        """
         CREATE TABLE IF NOT EXISTS stocks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             symbol TEXT UNIQUE
         )
-    """)
-    cur.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS weekly_data (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             stock_id INTEGER,
@@ -36,9 +31,118 @@ def setup_database():
             UNIQUE(stock_id, date),
             FOREIGN KEY (stock_id) REFERENCES stocks(id)
         )
-    """)
+        """,
+    ],
+    # 2: provider dimension and daily bars from every provider
+    [
+        """
+        CREATE TABLE IF NOT EXISTS providers (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO providers (name) VALUES " + ", ".join(f"('{p}')" for p in PROVIDERS),
+        # Clustered on the primary key, so per-symbol date-range reads touch only the
+        # pages holding that range and need no separate table lookup
+        """
+        CREATE TABLE IF NOT EXISTS daily_bars (
+            stock_id INTEGER NOT NULL,
+            provider_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            PRIMARY KEY (stock_id, provider_id, date),
+            FOREIGN KEY (stock_id) REFERENCES stocks(id),
+            FOREIGN KEY (provider_id) REFERENCES providers(id)
+        ) WITHOUT ROWID
+        """,
+        # Date-range reads across all symbols of one provider (volatility screens)
+        "CREATE INDEX IF NOT EXISTS idx_daily_bars_provider_date ON daily_bars (provider_id, date, close)",
+        # AVG/MIN/MAX(close) per symbol in process_data is answered from this index alone
+        "CREATE INDEX IF NOT EXISTS idx_weekly_data_stock_close ON weekly_data (stock_id, close)",
+    ],
+    # 3: per-symbol rollups of weekly_data kept current by triggers
+    ROLLUP_SCHEMA,
+    # 4: weekly bars that retention.py downsamples old daily bars into
+    [
+        """
+        CREATE TABLE IF NOT EXISTS weekly_bars (
+            stock_id INTEGER NOT NULL,
+            provider_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            PRIMARY KEY (stock_id, provider_id, date),
+            FOREIGN KEY (stock_id) REFERENCES stocks(id),
+            FOREIGN KEY (provider_id) REFERENCES providers(id)
+        ) WITHOUT ROWID
+        """,
+    ],
+]
+
+def schema_version(conn):
+    """
+    Returns the number of migrations already applied to the database.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """
+    Applies every migration the database has not seen yet.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+
+    What the code does:
+    - Reads the current version from PRAGMA user_version.
+    - Runs each newer migration inside its own transaction together with the version bump,
+      so a failed migration leaves the database at the previous version.
+
+    Returns:
+    int: The schema version after migrating.
+    """
+    version = schema_version(conn)
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+    return version
+
+def setup_database(db_name=DB_NAME):
+    """
+    Initializes the SQLite database by creating or upgrading the necessary tables.
+
+    Parameters:
+    db_name (str): Path to the SQLite database. Default is DB_NAME ('stocks.db').
+
+    What the code does:
+    - Connects to the database.
+    - Creates the 'stocks' table with 'id' and 'symbol'.
+    - Creates the 'weekly_data' table with stock metrics and a foreign key reference to 'stocks'.
+    - Creates the 'providers' and 'daily_bars' tables and their covering indexes.
+    - Creates the 'weekly_rollups' table and the triggers that maintain it.
+    - Creates the 'weekly_bars' table that old daily bars are downsampled into.
+    - Skips any migration the database already has.
+
+    Returns:
+    None: This function does not return any value.
+    """
 
-    conn.commit()
+    conn = sqlite3.connect(db_name)
+    migrate(conn)
     conn.close()
 
 if __name__ == "__main__":
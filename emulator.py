@@ -0,0 +1,447 @@
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+#### SYNTHETIC PRICE SERIES: ####
+
+def _seed(symbol):
+    return int(hashlib.sha256(symbol.encode("utf-8")).hexdigest()[:8], 16)
+
+def synthetic_bar(symbol, day):
+    """
+    Returns a deterministic (open, high, low, close, volume) bar for a symbol on a date.
+    The same symbol and date always produce the same bar, whatever range was requested.
+    """
+    seed = _seed(symbol)
+    rng = random.Random(seed ^ day.toordinal())
+    base = 50 + seed % 400
+    trend = 1 + 0.15 * math.sin(day.toordinal() / 40 + seed % 7)
+    close = base * trend * (1 + 0.02 * (rng.random() - 0.5))
+    open_ = close * (1 + 0.01 * (rng.random() - 0.5))
+    high = max(open_, close) * (1 + 0.01 * rng.random())
+    low = min(open_, close) * (1 - 0.01 * rng.random())
+    volume = int(1_000_000 + rng.random() * 9_000_000)
+    return round(open_, 4), round(high, 4), round(low, 4), round(close, 4), volume
+
+def trading_days(start, end, interval="day"):
+    """
+    Yields the weekdays from start to end, or only the Fridays when interval is "week".
+    """
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and (interval != "week" or day.weekday() == 4):
+            yield day
+        day += timedelta(days=1)
+
+def _parse_date(value, default):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return default
+
+# Days per unit of a Yahoo Finance range such as "5d", "3mo" or "2y"
+_RANGE_UNITS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+def _range_start(value, today, max_days):
+    """
+    Returns the first day of a Yahoo Finance chart range, or raises ValueError for one it does
+    not recognize. "max" reaches back max_days and "ytd" to the start of the year.
+    """
+    if value == "max":
+        return today - timedelta(days=max_days)
+    if value == "ytd":
+        return date(today.year, 1, 1)
+    for unit, days in _RANGE_UNITS.items():
+        count = value[:-len(unit)]
+        if value.endswith(unit) and count.isdigit() and int(count) > 0:
+            return today - timedelta(days=int(count) * days)
+    raise ValueError(f"Invalid range {value!r}: use e.g. 5d, 1wk, 3mo, 2y, ytd or max")
+
+def _epoch_ms(day):
+    # Bars are stamped at midnight New York time, as Polygon.io does (05:00 UTC in winter)
+    return int(datetime(day.year, day.month, day.day, 5, tzinfo=timezone.utc).timestamp() * 1000)
+
+#### PROVIDER-SHAPED PAYLOADS: ####
+
+def alpha_vantage_payload(symbol, weeks=520):
+    end = date.today()
+    series = {}
+    for day in sorted(trading_days(end - timedelta(weeks=weeks), end, "week"), reverse=True):
+        o, h, l, c, v = synthetic_bar(symbol, day)
+        series[day.isoformat()] = {
+            "1. open": f"{o:.4f}",
+            "2. high": f"{h:.4f}",
+            "3. low": f"{l:.4f}",
+            "4. close": f"{c:.4f}",
+            "5. volume": str(v),
+        }
+    return {
+        "Meta Data": {
+            "1. Information": "Weekly Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": end.isoformat(),
+            "4. Time Zone": "US/Eastern",
+        },
+        "Weekly Time Series": series,
+    }
+
+def polygon_payload(symbol, start, end, timespan="day"):
+    results = []
+    for day in trading_days(start, end, timespan):
+        o, h, l, c, v = synthetic_bar(symbol, day)
+        results.append({"o": o, "h": h, "l": l, "c": c, "v": v, "t": _epoch_ms(day), "n": v // 100})
+    return {
+        "ticker": symbol,
+        "status": "OK",
+        "adjusted": True,
+        "queryCount": len(results),
+        "resultsCount": len(results),
+        "results": results,
+    }
+
+def polygon_grouped_payload(symbols, day):
+    results = []
+    if day.weekday() < 5:
+        for symbol in symbols:
+            o, h, l, c, v = synthetic_bar(symbol, day)
+            results.append({"T": symbol, "o": o, "h": h, "l": l, "c": c, "v": v, "t": _epoch_ms(day), "n": v // 100})
+    return {
+        "status": "OK",
+        "adjusted": True,
+        "queryCount": len(results),
+        "resultsCount": len(results),
+        "results": results,
+    }
+
+def financialdatasets_payload(symbol, start, end, interval="day"):
+    prices = []
+    for day in trading_days(start, end, interval):
+        o, h, l, c, v = synthetic_bar(symbol, day)
+        prices.append({
+            "open": o, "high": h, "low": l, "close": c, "volume": v,
+            "time": f"{day.isoformat()}T05:00:00Z",
+        })
+    return {"ticker": symbol, "prices": prices}
+
+def yahoo_payload(symbol, start, end):
+    days = list(trading_days(start, end))
+    bars = [synthetic_bar(symbol, day) for day in days]
+    quote = {
+        "open": [b[0] for b in bars],
+        "high": [b[1] for b in bars],
+        "low": [b[2] for b in bars],
+        "close": [b[3] for b in bars],
+        "volume": [b[4] for b in bars],
+    }
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"symbol": symbol, "currency": "USD", "exchangeTimezoneName": "America/New_York"},
+                "timestamp": [_epoch_ms(day) // 1000 for day in days],
+                "indicators": {"quote": [quote]},
+            }],
+            "error": None,
+        }
+    }
+
+#### HTTP SERVER: ####
+
+# Symbols in the emulated market: the usual tickers plus the load test's synthetic ones
+DEFAULT_UNIVERSE = ["AAPL", "MSFT", "GOOGL", "TSLA"] + [f"SYM{i:05d}" for i in range(1000)]
+
+class EmulatorConfig:
+    """
+    Knobs for how the emulator behaves.
+
+    latency_ms / jitter_ms: delay added before every response.
+    error_rate: fraction of requests answered with HTTP 500.
+    rate_limit_per_minute: requests allowed per API key per minute before throttling.
+        Alpha Vantage answers an over-limit request with a 200 and a "Note", like the real API;
+        the others answer 429 with a Retry-After header.
+    retry_after: seconds sent in Retry-After.
+    history_weeks: weeks in every Alpha Vantage response, which sets its payload size.
+    universe: the symbols Polygon.io's grouped daily endpoint reports, standing in for the market.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit_per_minute=None,
+                 retry_after=1, history_weeks=520, seed=None, universe=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.retry_after = retry_after
+        self.history_weeks = history_weeks
+        self.universe = list(universe) if universe is not None else list(DEFAULT_UNIVERSE)
+        self.rng = random.Random(seed)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, the body waits for the
+    # client's delayed ACK and every response gains ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _throttled(self, key):
+        # Sliding one-minute window of request times per API key
+        limit = self.server.config.rate_limit_per_minute
+        if limit is None:
+            return False
+        now = time.monotonic()
+        with self.server.lock:
+            window = self.server.requests.setdefault(key, deque())
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) >= limit:
+                return True
+            window.append(now)
+            return False
+
+    def _count(self, name):
+        with self.server.lock:
+            self.server.stats[name] += 1
+
+    def do_GET(self):
+        config = self.server.config
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        today = date.today()
+        self._count("requests")
+
+        delay = config.latency_ms + config.jitter_ms * config.rng.random()
+        if delay:
+            time.sleep(delay / 1000)
+
+        key = query.get("apikey") or query.get("apiKey") or self.headers.get("X-Api-Key") or "anonymous"
+        if self._throttled((parts[0] if parts else "", key)):
+            self._count("throttled")
+            if parts == ["query"]:
+                self._send_json(200, {"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is exceeded."})
+            else:
+                self.send_response(429)
+                self.send_header("Retry-After", str(config.retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            return
+        if config.rng.random() < config.error_rate:
+            self._count("errors")
+            self._send_json(500, {"error": "Injected server error"})
+            return
+
+        if parts == ["query"]:
+            payload = alpha_vantage_payload(query.get("symbol", "AAPL"), config.history_weeks)
+        elif parts[:3] == ["v8", "finance", "chart"] and len(parts) == 4:
+            try:
+                start = _range_start(query.get("range", "7d"), today, config.history_weeks * 7)
+            except ValueError as e:
+                self._send_json(400, {"chart": {"result": None, "error": {"code": "Bad Request", "description": str(e)}}})
+                return
+            payload = yahoo_payload(parts[3], start, today)
+        elif parts[:6] == ["v2", "aggs", "grouped", "locale", "us", "market"] and len(parts) == 8:
+            payload = polygon_grouped_payload(config.universe, _parse_date(parts[7], today))
+        elif parts[:3] == ["v2", "aggs", "ticker"] and len(parts) == 9:
+            symbol, timespan = parts[3], parts[6]
+            start = _parse_date(parts[7], today - timedelta(days=7))
+            end = _parse_date(parts[8], today)
+            payload = polygon_payload(symbol, start, end, timespan)
+        elif parts == ["prices"]:
+            start = _parse_date(query.get("start_date"), today - timedelta(days=7))
+            end = _parse_date(query.get("end_date"), today)
+            payload = financialdatasets_payload(query.get("ticker", "AAPL"), start, end, query.get("interval", "day"))
+        else:
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+        self._send_json(200, payload)
+
+# data.py settings, also read from the environment, that point each provider's fetcher at a host
+BASE_URL_SETTINGS = ("ALPHA_BASE_URL", "FINANCIAL_DATASETS_BASE_URL", "POLYGON_BASE_URL", "YAHOO_BASE_URL")
+
+class ProviderEmulator:
+    """
+    A local HTTP server that answers like Alpha Vantage, Polygon.io, FinancialDatasets.ai and
+    Yahoo Finance's chart API with synthetic data, so the fetch path can be exercised without
+    spending API quota. Latency, errors and throttling are set through an EmulatorConfig.
+
+    Use it as a context manager and call point_data_at() to redirect the fetchers:
+
+        with ProviderEmulator() as emulator:
+            emulator.point_data_at()
+            data.fetch_polygon_daily_data("AAPL", "2024-01-01", "2024-03-01")
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, config=None):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.config = config or EmulatorConfig()
+        self.server.lock = threading.Lock()
+        self.server.requests = {}
+        self.server.stats = {"requests": 0, "throttled": 0, "errors": 0}
+        self.thread = None
+
+    @property
+    def stats(self):
+        return dict(self.server.stats)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="provider-emulator", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def point_data_at(self):
+        """
+        Redirects the data.py fetchers to this server by overriding their base URLs.
+
+        Returns:
+        dict: The base URLs that were replaced, for restore_data().
+        """
+        import data
+        previous = {name: getattr(data, name) for name in BASE_URL_SETTINGS}
+        for name in BASE_URL_SETTINGS:
+            setattr(data, name, self.base_url)
+        return previous
+
+    @staticmethod
+    def restore_data(previous):
+        """
+        Puts back the base URLs returned by point_data_at() and drops the pooled sessions,
+        whose kept-alive connections still lead to this server.
+        """
+        import data
+        for name, url in previous.items():
+            setattr(data, name, url)
+        data.configure_http()
+
+    def environment(self):
+        """
+        Returns the environment variables that point a separate process at this server.
+        """
+        return {name: self.base_url for name in BASE_URL_SETTINGS}
+
+#### LOAD TESTING: ####
+
+def run_load_test(n_symbols=1000, config=None, db_name=None, daily=True):
+    """
+    Measures the throughput of the whole fetch -> normalize -> insert pipeline offline.
+
+    Parameters:
+    n_symbols (int): Number of synthetic symbols to ingest. Default is 1000.
+    config (EmulatorConfig, optional): Emulator behaviour. Default answers instantly and never fails.
+    db_name (str, optional): Database to load into. Default is a fresh temporary file.
+    daily (bool): Also sync daily bars from the three daily providers. Default is True.
+
+    What the code does:
+    - Starts an emulator and points data.py at it, restoring data.py's base URLs afterwards.
+    - Turns off the response cache and client-side rate limits so every request is real work.
+    - Runs the incremental weekly sync and, optionally, the daily sync into a migrated database.
+
+    Returns:
+    dict: Symbols, rows written, elapsed seconds and throughput per stage.
+    """
+    import db_insert
+    from cache import response_cache
+    from db_setup import setup_database
+    from rate_limit import quota_scheduler
+
+    if db_name is None:
+        db_name = os.path.join(tempfile.mkdtemp(prefix="emulator-"), "stocks.db")
+    setup_database(db_name)
+    symbols = [f"SYM{i:05d}" for i in range(n_symbols)]
+    # Grouped daily requests only report the emulated market, so it must hold every symbol.
+    # The universe is extended on a copy, leaving the caller's config as it was.
+    config = copy.copy(config or EmulatorConfig())
+    listed = set(config.universe)
+    config.universe = config.universe + [s for s in symbols if s not in listed]
+
+    cache_enabled = response_cache.enabled
+    limits = quota_scheduler.limits
+    response_cache.enabled = False
+    quota_scheduler.limits = {}
+    quota_scheduler._limiters.clear()
+    report = {"symbols": n_symbols, "db": db_name}
+    base_urls = None
+    try:
+        with ProviderEmulator(config=config) as emulator:
+            base_urls = emulator.point_data_at()
+            start = time.perf_counter()
+            weekly = db_insert.sync_weekly_data(symbols, db_name=db_name)
+            elapsed = time.perf_counter() - start
+            rows = sum(weekly.values())
+            report["weekly"] = {"rows": rows, "seconds": elapsed,
+                                "symbols_per_s": n_symbols / elapsed, "rows_per_s": rows / elapsed}
+            if daily:
+                start = time.perf_counter()
+                counts = db_insert.sync_daily_bars(symbols, db_name=db_name)
+                elapsed = time.perf_counter() - start
+                rows = sum(counts.values())
+                report["daily"] = {"rows": rows, "seconds": elapsed,
+                                   "symbols_per_s": n_symbols / elapsed, "rows_per_s": rows / elapsed}
+            report["server"] = emulator.stats
+    finally:
+        if base_urls is not None:
+            ProviderEmulator.restore_data(base_urls)
+        response_cache.enabled = cache_enabled
+        quota_scheduler.limits = limits
+        quota_scheduler._limiters.clear()
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the stock data APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per minute per API key")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--history-weeks", type=int, default=520)
+    parser.add_argument("--load-test", type=int, metavar="N", help="ingest N synthetic symbols and report throughput")
+    args = parser.parse_args()
+
+    config = EmulatorConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit,
+                            args.retry_after, args.history_weeks)
+    if args.load_test:
+        print(json.dumps(run_load_test(args.load_test, config), indent=2))
+    else:
+        emulator = ProviderEmulator(args.host, args.port, config)
+        for name, value in emulator.environment().items():
+            print(f"export {name}={value}")
+        try:
+            emulator.server.serve_forever()
+        except KeyboardInterrupt:
+            emulator.server.server_close()
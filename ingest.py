@@ -0,0 +1,293 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from data import fetch_provider_data, payload_error
+from db_insert import (
+    BATCH_SIZE,
+    DAILY_PROVIDERS,
+    DEFAULT_HISTORY_DAYS,
+    MAX_WEEKS,
+    WEEKLY_PARSERS,
+    get_connection,
+    latest_daily_dates,
+    latest_weekly_dates,
+    parse_daily,
+    provider_ids,
+    resolve_stock_ids,
+    sync_cutoff,
+    upsert_daily_bars,
+    upsert_weekly_delta,
+    weekly_provider_id
+)
+from db_setup import DB_NAME
+
+#### SYMBOL UNIVERSE AND CHECKPOINTS: ####
+
+def read_symbols(path):
+    """
+    Reads a symbol universe: one or more symbols per line, separated by commas or spaces.
+    Blank lines and anything after a "#" are ignored, and duplicates are dropped in order.
+    """
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            symbols.extend(s.strip().upper() for s in line.replace(",", " ").split())
+    return list(dict.fromkeys(symbols))
+
+class Checkpoint:
+    """
+    An append-only log of symbols whose rows are committed, so an interrupted run can resume.
+
+    A line is only written after the transaction holding that symbol's rows has committed, so
+    after a crash every symbol in the file is safely stored and any other symbol is fetched again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a") if path else None
+
+    def mark(self, symbols):
+        if self._file is None or not symbols:
+            return
+        self._file.write("".join(f"{s}\n" for s in symbols))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.update(symbols)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+#### PROGRESS: ####
+
+class Progress:
+    """
+    Thread-safe counters for symbols, rows and errors, with a one-line live report.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.symbols = 0
+        self.rows = 0
+        self.errors = Counter()
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, symbols=0, rows=0, error=None):
+        with self._lock:
+            self.symbols += symbols
+            self.rows += rows
+            if error is not None:
+                self.errors[type(error).__name__] += 1
+
+    def report(self):
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.start, 1e-9)
+            errors = sum(self.errors.values())
+            detail = ", ".join(f"{name} {count}" for name, count in self.errors.most_common(3))
+            return (
+                f"{self.symbols}/{self.total} symbols  {self.symbols / elapsed:.1f} symbols/s  "
+                f"{self.rows / elapsed:.0f} rows/s  errors {errors}" + (f" ({detail})" if detail else "")
+            )
+
+#### FETCH WORKERS AND THE WRITER: ####
+
+# Marks the end of the work for the writer thread
+_DONE = object()
+
+def _fetch_worker(jobs, results, provider, mode, progress):
+    # Pulls (symbol, stock_id, start, end, cutoff) jobs, fetches and parses them and hands the
+    # rows to the writer. Only symbols with a valid payload reach the writer, which checkpoints
+    # them; failures are counted in progress.errors. results is bounded, so a slow writer
+    # holds the workers back.
+    interval = "week" if mode == "weekly" else "day"
+    while True:
+        job = jobs.get()
+        if job is _DONE:
+            return
+        symbol, stock_id, start, end, cutoff = job
+        try:
+            payload = fetch_provider_data(provider, symbol, start, end, interval)
+            # A rate-limit notice or error message must count as a failure, so the symbol is
+            # not checkpointed and a resumed run fetches it again
+            error = payload_error(provider, payload)
+            if error is not None:
+                raise ValueError(error)
+            if mode == "weekly":
+                rows = WEEKLY_PARSERS[provider](payload)
+                if cutoff is not None:
+                    rows = [r for r in rows if r[0] >= cutoff]
+                elif provider == "alpha_vantage":
+                    rows = rows[:MAX_WEEKS]
+            else:
+                # Yahoo Finance only takes a period, so drop anything before the requested start
+                rows = [r for r in parse_daily(provider, payload) if r[0] >= start]
+        except Exception as e:
+            progress.add(symbols=1, error=e)
+            print(f"\n{symbol}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        results.put((symbol, stock_id, cutoff, rows))
+
+def _writer(results, db_name, provider, mode, batch_size, checkpoint, progress, failures):
+    # The only thread that writes to SQLite: commits one transaction per batch of symbols,
+    # then checkpoints them
+    conn = get_connection(db_name)
+    provider_id = provider_ids(conn)[provider] if mode == "daily" else weekly_provider_id(conn, provider)
+    batch = {}
+
+    def flush():
+        if mode == "weekly":
+            deltas = {stock_id: (cutoff, rows) for stock_id, cutoff, rows in batch.values()}
+            written = upsert_weekly_delta(conn, deltas, provider_id)
+        else:
+            written = upsert_daily_bars(conn, provider_id, {stock_id: rows for stock_id, _, rows in batch.values()})
+        checkpoint.mark(list(batch))
+        progress.add(symbols=len(batch), rows=written)
+        batch.clear()
+
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            symbol, stock_id, cutoff, rows = item
+            batch[symbol] = (stock_id, cutoff, rows)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except Exception as e:
+        failures.append(e)
+        # Keep draining so the workers never block on a full queue
+        while results.get() is not _DONE:
+            pass
+    finally:
+        conn.close()
+
+def ingest(symbols, provider="alpha_vantage", mode="weekly", db_name=DB_NAME, workers=8,
+           batch_size=BATCH_SIZE, checkpoint_path=None, progress_every=1.0):
+    """
+    Fetches many symbols concurrently and writes them through a single writer thread.
+
+    Parameters:
+    symbols (list): Stock ticker symbols.
+    provider (str): The provider to fetch from. Default is "alpha_vantage".
+    mode (str): "weekly" syncs weekly bars ('weekly_data' for Alpha Vantage, 'weekly_bars' for the
+        others), "daily" syncs 'daily_bars'. Default is "weekly".
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    workers (int): Fetch threads. The provider's rate limit still applies. Default is 8.
+    batch_size (int): Symbols committed per transaction. Default is BATCH_SIZE.
+    checkpoint_path (str, optional): Checkpoint file. Symbols listed in it are skipped and
+        every committed symbol is appended, so rerunning after a crash resumes the run.
+    progress_every (float): Seconds between progress lines on stderr. Default is 1.0.
+
+    What the code does:
+    - Works out the incremental start date of every symbol up front, like sync_weekly_data
+      and sync_daily_bars do.
+    - Runs `workers` fetch threads that parse responses and put the rows on a bounded queue.
+    - One writer thread owns the SQLite connection, so fetches never wait on database locks
+      and the database never sees two writers.
+    - Prints symbols/s, rows/s and error counts while it runs.
+
+    Returns:
+    Progress: The final counters.
+    """
+    if mode == "weekly" and provider not in WEEKLY_PARSERS:
+        raise ValueError(f"{provider} has no weekly parser; choose from {sorted(WEEKLY_PARSERS)}")
+    if mode == "daily" and provider not in DAILY_PROVIDERS:
+        raise ValueError(f"{provider} has no daily bars; choose from {list(DAILY_PROVIDERS)}")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    pending = [s for s in symbols if s not in checkpoint.done]
+    today = datetime.now()
+    default_start = (today - timedelta(days=DEFAULT_HISTORY_DAYS)).strftime('%Y-%m-%d')
+    end = today.strftime('%Y-%m-%d')
+
+    conn = get_connection(db_name)
+    try:
+        with conn:
+            stock_ids = resolve_stock_ids(conn, pending)
+        if mode == "weekly":
+            latest = latest_weekly_dates(conn, stock_ids.values(), weekly_provider_id(conn, provider))
+        else:
+            latest = latest_daily_dates(conn, provider_ids(conn)[provider], stock_ids.values())
+    finally:
+        conn.close()
+
+    jobs = queue.Queue()
+    for symbol in pending:
+        stock_id = stock_ids[symbol]
+        if mode == "weekly":
+            cutoff = sync_cutoff(latest.get(stock_id))
+            jobs.put((symbol, stock_id, cutoff or default_start, end, cutoff))
+        else:
+            # Re-fetch the latest stored day in case it was written before the close
+            jobs.put((symbol, stock_id, latest.get(stock_id) or default_start, end, None))
+    for _ in range(workers):
+        jobs.put(_DONE)
+
+    progress = Progress(len(pending))
+    results = queue.Queue(maxsize=batch_size * 2)
+    failures = []
+    fetchers = [
+        threading.Thread(target=_fetch_worker, args=(jobs, results, provider, mode, progress),
+                         name=f"ingest-fetch-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    writer = threading.Thread(
+        target=_writer, args=(results, db_name, provider, mode, batch_size, checkpoint, progress, failures),
+        name="ingest-writer", daemon=True
+    )
+    writer.start()
+    for thread in fetchers:
+        thread.start()
+
+    try:
+        alive = fetchers
+        while alive:
+            alive[0].join(progress_every)
+            alive = [t for t in alive if t.is_alive()]
+            print(f"\r{progress.report()}", end="", file=sys.stderr, flush=True)
+        results.put(_DONE)
+        writer.join()
+    finally:
+        checkpoint.close()
+    print(f"\r{progress.report()}", file=sys.stderr)
+    if failures:
+        raise failures[0]
+    return progress
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a universe of symbols into stocks.db")
+    parser.add_argument("symbols_file", help="file with one or more symbols per line")
+    parser.add_argument("--provider", default="alpha_vantage",
+                        choices=sorted(set(WEEKLY_PARSERS) | set(DAILY_PROVIDERS)))
+    parser.add_argument("--daily", action="store_true", help="sync daily bars instead of weekly data")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--checkpoint", default=None,
+                        help="resume file; default is <symbols_file>.<provider>.<weekly|daily>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    mode = "daily" if args.daily else "weekly"
+    checkpoint = args.checkpoint or f"{args.symbols_file}.{args.provider}.{mode}.checkpoint"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    result = ingest(read_symbols(args.symbols_file), args.provider, mode, args.db, args.workers,
+                    args.batch_size, checkpoint)
+    if not result.errors:
+        # A clean run leaves nothing to resume
+        os.remove(checkpoint)
@@ -0,0 +1,48 @@
+import importlib
+import threading
+
+#### LAZY IMPORTS: ####
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access.
+
+    yfinance, pandas, matplotlib and seaborn together take around a second to import,
+    and most runs of the scripts here only touch one of them, if any.
+    Binding them through lazy_import keeps `import data` or `import visualize` cheap,
+    and the cost is paid by the first call that actually uses the module.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for `name`, e.g. plt = lazy_import("matplotlib.pyplot").
+    """
+    return LazyModule(name)
@@ -0,0 +1,184 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+#### METRICS REGISTRY: ####
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Prefix of every exported metric name
+NAMESPACE = "stocks"
+
+# When set, the registry is written to this file at exit: JSON if it ends in .json,
+# otherwise the Prometheus text format (e.g. for node_exporter's textfile collector)
+METRICS_FILE = os.getenv("METRICS_FILE")
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus layout.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """
+        Estimates the q-th quantile (0-1) as the upper bound of the bucket it falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return float("inf")
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms, keyed by metric name and labels.
+
+        registry.inc("rows_written_total", 25, table="weekly_data")
+        registry.observe("stage_seconds", 0.12, stage="fetch.polygon")
+        registry.write("metrics.prom")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_prometheus(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            seen = set()
+            for (name, key), value in counters:
+                full = f"{NAMESPACE}_{name}"
+                if full not in seen:
+                    seen.add(full)
+                    lines.append(f"# TYPE {full} counter")
+                lines.append(f"{full}{_format_labels(key)} {value}")
+            for (name, key), h in histograms:
+                full = f"{NAMESPACE}_{name}"
+                if full not in seen:
+                    seen.add(full)
+                    lines.append(f"# TYPE {full} histogram")
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{full}_sum{_format_labels(key)} {h.sum}")
+                lines.append(f"{full}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """
+        Returns every metric as plain data, with p50/p95 estimates for each histogram.
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for (name, key), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name, "labels": dict(key), "count": h.count, "sum": h.sum,
+                        "p50": h.quantile(0.5), "p95": h.quantile(0.95),
+                        "buckets": dict(zip(map(str, h.buckets), h.counts)),
+                    }
+                    for (name, key), h in sorted(self.histograms.items(), key=lambda item: item[0])
+                ],
+            }
+
+    def write(self, path):
+        """
+        Writes the metrics to `path`, as JSON if it ends in .json and Prometheus text otherwise.
+        The file is replaced atomically so a collector never reads half of it.
+        """
+        body = json.dumps(self.to_dict(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+# Shared registry used by every instrumented module
+registry = MetricsRegistry()
+
+if METRICS_FILE:
+    atexit.register(lambda: registry.write(METRICS_FILE))
+
+#### INSTRUMENTATION: ####
+
+def instrument(stage):
+    """
+    Decorator that records how long every call of the function takes and how it fails.
+
+    Parameters:
+    stage (str): Name of the pipeline stage, e.g. "fetch.polygon" or "render.volatility".
+
+    What the code does:
+    - Adds the call's duration to the stage_seconds histogram of `stage`, whether it succeeded or not.
+    - Counts exceptions in errors_total by stage and exception class, then re-raises them.
+
+    Returns:
+    callable: The wrapped function.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                registry.inc("errors_total", stage=stage, error=type(e).__name__)
+                raise
+            finally:
+                registry.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorate
@@ -0,0 +1,164 @@
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+#### NORMALIZING PROVIDER RESPONSES: ####
+
+# Every normalizer returns the same shape: a DataFrame indexed by a sorted,
+# timezone-naive DatetimeIndex named "date" with these float64 columns.
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+ALPHA_COLUMNS = {
+    "1. open": "open",
+    "2. high": "high",
+    "3. low": "low",
+    "4. close": "close",
+    "5. volume": "volume",
+}
+POLYGON_COLUMNS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume"}
+
+def empty_frame():
+    """
+    Returns an OHLCV frame with no rows.
+    """
+    index = pd.DatetimeIndex([], name="date")
+    return pd.DataFrame({c: np.array([], dtype="float64") for c in COLUMNS}, index=index)
+
+def _finish(df, dates):
+    # Shared tail of every normalizer: typed columns, date index, chronological order
+    df = df[COLUMNS].astype("float64")
+    df.index = pd.DatetimeIndex(dates, name="date")
+    return df.sort_index()
+
+def normalize_alpha_vantage(payload, key="Weekly Time Series"):
+    """
+    Converts an Alpha Vantage time series response into an OHLCV frame.
+
+    Parameters:
+    payload (dict): The JSON response from fetch_alpha_vantage_data.
+    key (str): The series inside the response. Default is "Weekly Time Series".
+
+    What the code does:
+    - Builds one DataFrame from the nested dict instead of looping over dates.
+    - Casts the string prices to float64 with a single astype.
+    - Parses every date with one pd.to_datetime call.
+
+    Returns:
+    DataFrame: Columns open, high, low, close, volume indexed by date.
+    """
+    series = payload.get(key) if isinstance(payload, dict) else None
+    if not series:
+        return empty_frame()
+    df = pd.DataFrame.from_dict(series, orient="index").rename(columns=ALPHA_COLUMNS)
+    return _finish(df, pd.to_datetime(df.index, format="%Y-%m-%d"))
+
+def normalize_yahoo(frame):
+    """
+    Converts a Yahoo Finance history DataFrame into an OHLCV frame.
+
+    Parameters:
+    frame (DataFrame): The result of fetch_yahoo_data.
+
+    Returns:
+    DataFrame: Columns open, high, low, close, volume indexed by date.
+    """
+    if frame is None or frame.empty:
+        return empty_frame()
+    df = frame.rename(columns=str.lower)
+    dates = df.index
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return _finish(df, dates.normalize())
+
+def normalize_financialdatasets(payload):
+    """
+    Converts a FinancialDatasets.ai prices response into an OHLCV frame.
+
+    Parameters:
+    payload (dict): The JSON response from fetch_financialdatasets_data.
+
+    Returns:
+    DataFrame: Columns open, high, low, close, volume indexed by date.
+    """
+    prices = payload.get("prices") if isinstance(payload, dict) else None
+    if not prices:
+        return empty_frame()
+    df = pd.DataFrame.from_records(prices)
+    # Timestamps look like "2024-01-02T05:00:00Z" or "2024-01-02 00:00:00"; only the date matters
+    dates = pd.to_datetime(df["time"].str.slice(0, 10), format="%Y-%m-%d")
+    return _finish(df, dates)
+
+def normalize_polygon(payload):
+    """
+    Converts a Polygon.io aggregates response into an OHLCV frame.
+
+    Parameters:
+    payload (dict): The JSON response from fetch_polygon_daily_data.
+
+    Returns:
+    DataFrame: Columns open, high, low, close, volume indexed by date.
+    """
+    results = payload.get("results") if isinstance(payload, dict) else None
+    if not results:
+        return empty_frame()
+    df = pd.DataFrame.from_records(results).rename(columns=POLYGON_COLUMNS)
+    # "t" is the bar start in epoch milliseconds (midnight Eastern), converted in one call
+    dates = pd.to_datetime(df["t"].to_numpy(), unit="ms").normalize()
+    return _finish(df, dates)
+
+NORMALIZERS = {
+    "alpha_vantage": normalize_alpha_vantage,
+    "yahoo": normalize_yahoo,
+    "financialdatasets": normalize_financialdatasets,
+    "polygon": normalize_polygon,
+}
+
+def normalize(provider, payload):
+    """
+    Converts any provider's response into an OHLCV frame.
+
+    Parameters:
+    provider (str): One of the keys of NORMALIZERS.
+    payload (dict or DataFrame): The raw response from the matching fetcher.
+
+    Returns:
+    DataFrame: Columns open, high, low, close, volume indexed by date.
+    """
+    return NORMALIZERS[provider](payload)
+
+#### HELPERS FOR CONSUMERS: ####
+
+def week_ending(frame):
+    """
+    Re-dates each bar to the Friday ending its week, so weekly bars from different providers line up.
+    """
+    dates = frame.index
+    shift = pd.to_timedelta((4 - dates.weekday) % 7, unit="D")
+    frame = frame.copy()
+    frame.index = pd.DatetimeIndex(dates + shift, name="date")
+    return frame
+
+def to_rows(frame, newest_first=False):
+    """
+    Converts an OHLCV frame into (date, open, high, low, close, volume) tuples for the database.
+
+    Parameters:
+    frame (DataFrame): A normalized OHLCV frame.
+    newest_first (bool): Reverse the chronological order. Default is False.
+
+    Returns:
+    list: Tuples with "YYYY-MM-DD" dates, float prices and integer volumes.
+    """
+    if newest_first:
+        frame = frame.iloc[::-1]
+    dates = frame.index.strftime('%Y-%m-%d')
+    volume = frame["volume"].fillna(0).astype("int64")
+    return list(zip(
+        dates,
+        frame["open"].tolist(),
+        frame["high"].tolist(),
+        frame["low"].tolist(),
+        frame["close"].tolist(),
+        volume.tolist(),
+    ))
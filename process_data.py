@@ -1,15 +1,22 @@
-import sqlite3
+from db_access import get_read_pool
+from db_setup import DB_NAME
+from metrics import instrument
+from rollups import read_rollups
 
-def calculate_avg_close_and_write(filename="averages.txt"):
+@instrument("process.averages")
+def calculate_avg_close_and_write(filename="averages.txt", db_name=DB_NAME):
     """
     Calculates the average closing price for each stock symbol and writes the results to a text file.
 
     Parameters:
     filename (str): The name of the file to write the results to. The default is "averages.txt".
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
 
     What the code does:
-    - Connects to the SQLite database ('stocks.db').
-    - Joins the 'stocks' and 'weekly_data' tables on stock_id.
+    - Borrows a read-only connection from the database's read pool, which applies any pending
+      migrations when it is first created.
+    - Reads each symbol's running close total and count from the 'weekly_rollups' table,
+      which triggers keep current, so the cost does not grow with the stored history.
     - Calculates the average closing price for each symbol.
     - Writes the formatted results to the specified text file.
 
@@ -17,18 +24,8 @@ def calculate_avg_close_and_write(filename="averages.txt"):
     None: This function does not return any value.
     """
     
-    conn = sqlite3.connect("stocks.db")
-    cur = conn.cursor()
-    
-    # JOIN stocks + weekly_data and calculate average 
-    cur.execute("""
-    SELECT stocks.symbol, AVG(weekly_data.close)
-    FROM weekly_data
-    JOIN stocks ON weekly_data.stock_id = stocks.id
-    GROUP BY stocks.symbol
-    """)
-    
-    results = cur.fetchall()
+    # Averages come from the per-symbol rollups instead of a scan of weekly_data
+    results = [(r["symbol"], r["avg_close"]) for r in get_read_pool(db_name).execute(read_rollups)]
     
     # Write results to text file
     with open(filename, "w") as f:
@@ -38,19 +35,6 @@ def calculate_avg_close_and_write(filename="averages.txt"):
             f.write(f"{symbol}: ${avg_close:.2f}\n")
     
     print(f"Averages written to {filename}")
-    
-    # Omit 5 rows each time the script runs
-    cur.execute("""
-    DELETE FROM weekly_data
-    WHERE id IN (
-        SELECT id FROM weekly_data
-        ORDER BY date ASC
-        LIMIT 5
-    )
-    """)
-    
-    conn.commit()
-    conn.close()
 
 if __name__ == "__main__":
     calculate_avg_close_and_write()
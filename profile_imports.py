@@ -0,0 +1,59 @@
+import argparse
+import subprocess
+import sys
+
+# Modules that are run as scripts
+ENTRY_POINTS = ["process_data", "db_insert", "ingest", "analytics", "visualize", "render", "benchmark", "snapshot"]
+
+def import_profile(module):
+    """
+    Imports a module in a fresh interpreter under `python -X importtime`.
+
+    Parameters:
+    module (str): The module to import.
+
+    Returns:
+    list: (name, depth, self microseconds, cumulative microseconds) for every import in
+        `module`'s tree, in load order. The interpreter's own startup imports are left out.
+        The last entry is `module` itself, and its cumulative time is the whole import cost.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting shows as two spaces per level after the one separating space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    # Everything after the last top-level import before `module` belongs to its tree
+    start = len(entries) - 1
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    return entries[start:]
+
+def format_profile(module, entries, top=10):
+    """
+    Formats one module's total import time and its `top` slowest direct imports.
+    """
+    total = entries[-1][3] if entries else 0
+    lines = [f"{module}: {total / 1000:.1f} ms"]
+    direct = [(name, cumulative) for name, depth, _, cumulative in entries if depth == 1]
+    for name, cumulative in sorted(direct, key=lambda item: -item[1])[:top]:
+        lines.append(f"  {name:<28}{cumulative / 1000:>8.1f} ms")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long each script takes to import")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=5, help="slowest dependencies listed per module")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module; the fastest is kept")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        fastest = min(runs, key=lambda entries: entries[-1][3] if entries else 0)
+        print(format_profile(module, fastest, args.top))
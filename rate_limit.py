@@ -0,0 +1,308 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when a provider's daily quota is used up or a wait would exceed the caller's timeout."""
+
+
+def _env_limit(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return int(value) if value else None
+
+# Requests allowed per minute and per day for each provider. None means unlimited.
+# The defaults match the free tiers; paid keys can raise them through the environment.
+PROVIDER_RATE_LIMITS = {
+    "alpha_vantage": (_env_limit("ALPHA_RATE_PER_MINUTE", 5), _env_limit("ALPHA_RATE_PER_DAY", 25)),
+    "polygon": (_env_limit("POLYGON_RATE_PER_MINUTE", 5), _env_limit("POLYGON_RATE_PER_DAY", None)),
+    "financialdatasets": (
+        _env_limit("FINANCIAL_DATASETS_RATE_PER_MINUTE", None),
+        _env_limit("FINANCIAL_DATASETS_RATE_PER_DAY", None),
+    ),
+}
+
+# SQLite file that keeps each day's request counts between runs. An empty value keeps them
+# in memory only, so every process starts with the full daily quota.
+QUOTA_DB = os.getenv("QUOTA_DB", str(Path(__file__).parent / ".cache" / "quota.db"))
+
+
+class QuotaLedger:
+    """
+    Requests sent per (provider, API key, UTC day), stored in a small SQLite file.
+
+    The scripts here run as short CLI and cron invocations, so a counter in memory starts
+    from zero every time and a daily cap like Alpha Vantage's is never enforced across runs.
+    Counts are updated with single upserts, so separate processes share one budget.
+    API keys are stored as a hash, never as they are.
+    """
+
+    def __init__(self, path=QUOTA_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS quota_usage (
+                        provider TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        used INTEGER NOT NULL,
+                        PRIMARY KEY (provider, key, day)
+                    )
+                """)
+                # Only today's counts are ever read
+                conn.execute("DELETE FROM quota_usage WHERE day < ?", (str(RateLimiter._today()),))
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(api_key):
+        """
+        Returns the hash an API key is stored under.
+        """
+        return hashlib.sha256(str(api_key).encode("utf-8")).hexdigest()[:16]
+
+    def used(self, provider, key, day):
+        """
+        Returns the requests recorded for a provider and key on a day.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT used FROM quota_usage WHERE provider = ? AND key = ? AND day = ?",
+                (provider, key, str(day))
+            ).fetchone()
+        return row[0] if row else 0
+
+    def take(self, provider, key, day, limit):
+        """
+        Records one request if fewer than `limit` were sent that day.
+
+        Returns:
+        bool: Whether the request fitted in the quota.
+        """
+        if limit <= 0:
+            return False
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cur = conn.execute("""
+                    INSERT INTO quota_usage (provider, key, day, used) VALUES (?, ?, ?, 1)
+                    ON CONFLICT(provider, key, day) DO UPDATE SET used = used + 1 WHERE used < ?
+                """, (provider, key, str(day), limit))
+        return cur.rowcount > 0
+
+    def exhaust(self, provider, key, day, limit):
+        """
+        Records the day's quota as used up, e.g. after the provider said so itself.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("""
+                    INSERT INTO quota_usage (provider, key, day, used) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(provider, key, day) DO UPDATE SET used = MAX(used, excluded.used)
+                """, (provider, key, str(day), limit))
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at `rate` tokens per second.
+    Not thread-safe on its own; RateLimiter serializes access to it.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n=1):
+        """
+        Returns how many seconds until n tokens are available (0 if they are available now).
+        """
+        self._refill()
+        if self.tokens >= n:
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+    def consume(self, n=1):
+        self._refill()
+        self.tokens -= n
+
+    def remaining(self):
+        self._refill()
+        return self.tokens
+
+
+class RateLimiter:
+    """
+    Rate limit for a single API key: a per-minute token bucket plus a per-day counter
+    that resets at midnight UTC.
+
+    The minute bucket holds a single token by default, so requests are spread evenly
+    across the minute instead of bursting and then tripping the provider's limit.
+    With a QuotaLedger the day's count is read from and written to it, so it carries over
+    between runs; without one it is kept in memory.
+    """
+
+    def __init__(self, per_minute=None, per_day=None, burst=1, ledger=None, ledger_key=None):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.bucket = TokenBucket(per_minute / 60.0, burst) if per_minute else None
+        self.ledger = ledger if per_day is not None else None
+        self.ledger_key = ledger_key
+        self.day = self._today()
+        self.used_today = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).date()
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+        if self.ledger is not None:
+            # Other processes may have spent some of today's quota since the last look
+            self.used_today = self.ledger.used(*self.ledger_key, self.day)
+
+    def _take(self):
+        # Records one request against the day's quota, or returns False if it is used up
+        if self.ledger is not None:
+            if not self.ledger.take(*self.ledger_key, self.day, self.per_day):
+                self.used_today = self.per_day
+                return False
+        self.used_today += 1
+        return True
+
+    def acquire(self, timeout=None):
+        """
+        Blocks until a request may be sent, then records it against the quota.
+
+        Parameters:
+        timeout (float, optional): Maximum seconds to wait. None waits as long as needed.
+
+        What the code does:
+        - Raises QuotaExceededError straight away if the daily quota is used up.
+        - Otherwise queues the caller until the minute bucket has a token.
+
+        Returns:
+        float: Seconds spent waiting.
+        """
+        exhausted = f"Daily quota of {self.per_day} requests used up"
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    self._roll_day()
+                    if self.per_day is not None and self.used_today >= self.per_day:
+                        raise QuotaExceededError(exhausted)
+                    wait = self.bucket.wait_time() if self.bucket else 0.0
+                    if wait <= 0:
+                        if not self._take():
+                            raise QuotaExceededError(exhausted)
+                        if self.bucket:
+                            self.bucket.consume()
+                        return time.monotonic() - start
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        raise QuotaExceededError(f"Rate limit wait of {wait:.1f}s exceeds timeout")
+                    self._cond.wait(wait)
+            finally:
+                self.waiting -= 1
+
+    def exhaust(self):
+        """
+        Marks the rest of today's quota as used, e.g. when the provider answered that it is.
+        Does nothing without a daily quota.
+        """
+        with self._cond:
+            if self.per_day is None:
+                return
+            self._roll_day()
+            self.used_today = self.per_day
+            if self.ledger is not None:
+                self.ledger.exhaust(*self.ledger_key, self.day, self.per_day)
+
+    def remaining(self):
+        """
+        Returns the remaining budget as a dictionary.
+        """
+        with self._cond:
+            self._roll_day()
+            return {
+                "minute_tokens": self.bucket.remaining() if self.bucket else None,
+                "day_remaining": None if self.per_day is None else self.per_day - self.used_today,
+                "used_today": self.used_today,
+                "waiting": self.waiting,
+            }
+
+
+class QuotaScheduler:
+    """
+    Holds one RateLimiter per (provider, API key) so separate keys get separate budgets.
+    """
+
+    def __init__(self, limits=None, ledger=None):
+        self.limits = dict(PROVIDER_RATE_LIMITS, **(limits or {}))
+        self.ledger = ledger
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider, api_key=None):
+        with self._lock:
+            key = (provider, api_key)
+            if key not in self._limiters:
+                per_minute, per_day = self.limits.get(provider, (None, None))
+                ledger_key = (provider, QuotaLedger.key(api_key))
+                self._limiters[key] = RateLimiter(per_minute, per_day, ledger=self.ledger, ledger_key=ledger_key)
+            return self._limiters[key]
+
+    def acquire(self, provider, api_key=None, timeout=None):
+        """
+        Waits for a request slot for the given provider and key. See RateLimiter.acquire.
+        """
+        return self.limiter(provider, api_key).acquire(timeout)
+
+    def exhaust(self, provider, api_key=None):
+        """
+        Marks today's quota of the given provider and key as used up. See RateLimiter.exhaust.
+        """
+        self.limiter(provider, api_key).exhaust()
+
+    def remaining(self):
+        """
+        Returns the remaining budget of every limiter used so far, keyed by provider.
+        API keys are left out so the result is safe to print or log.
+        """
+        with self._lock:
+            limiters = list(self._limiters.items())
+        report = {}
+        for (provider, _), limiter in limiters:
+            report.setdefault(provider, []).append(limiter.remaining())
+        return report
+
+
+# Shared scheduler used by data.py
+quota_scheduler = QuotaScheduler(ledger=QuotaLedger(QUOTA_DB) if QUOTA_DB else None)
@@ -0,0 +1,269 @@
+import argparse
+
+from barstore import FIELDS, BarStore, to_days
+from db_access import get_read_pool
+from db_setup import DB_NAME
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+#### ALIGNING PROVIDERS: ####
+
+# A bar's key packs its symbol's code into the high 32 bits and its epoch day, shifted
+# to be non-negative, into the low 32 bits. Sorting by key sorts by symbol, then date.
+_DAY_BIAS = 1 << 31
+
+# A bar whose close is further than this from the consensus close counts as a deviation
+DEFAULT_TOLERANCE = 0.01
+
+# A source is stale when its last bar is more than this many calendar days behind the others
+DEFAULT_MAX_LAG = 2
+
+def _encode(codes, days):
+    return (codes.astype("int64") << 32) | (days.astype("int64") + _DAY_BIAS)
+
+def _nanmedian(matrix):
+    # Median down axis 0 ignoring NaN. np.nanmedian handles a short axis one column at a
+    # time; sorting puts NaN last, so the median can be picked from the sorted rows directly.
+    ordered = np.sort(matrix, axis=0)
+    count = (~np.isnan(matrix)).sum(axis=0)
+    lo = np.maximum((count - 1) // 2, 0)[None, :]
+    hi = np.maximum(count // 2, 0)[None, :]
+    median = (np.take_along_axis(ordered, lo, axis=0) + np.take_along_axis(ordered, hi, axis=0))[0] / 2
+    median[count == 0] = np.nan
+    return median
+
+class Reconciliation:
+    """
+    Every provider's bars aligned on one trading calendar, with the consensus bar of each day.
+
+    Attributes:
+    providers (list): Provider names, the first axis of every (providers, days) matrix.
+    symbols (ndarray): Symbol names; symbol_of maps each calendar day to a position in this.
+    keys (ndarray): Sorted composite keys of the calendar days, one per (symbol, date).
+    symbol_of (ndarray): The symbol position of each calendar day.
+    days (ndarray): The epoch day of each calendar day.
+    bars (dict): Field mapped to a (providers, days) float64 matrix, NaN where a provider has no bar.
+    present (ndarray): (providers, days) bool matrix of which provider has which day.
+    consensus (dict): Field mapped to the median across providers for every calendar day.
+    deviation (ndarray): (providers, days) relative distance of each close from the consensus close.
+    extra (ndarray): (providers, symbols) count of bars a provider has on days not in the calendar.
+    """
+
+    def __init__(self, providers, symbols, keys, bars, present, extra, tolerance, max_lag):
+        self.providers = providers
+        self.symbols = symbols
+        self.keys = keys
+        self.symbol_of = (keys >> 32).astype("int64")
+        self.days = (keys & 0xFFFFFFFF) - _DAY_BIAS
+        self.bars = bars
+        self.present = present
+        self.extra = extra
+        self.tolerance = tolerance
+        self.max_lag = max_lag
+        self.consensus = {f: _nanmedian(m) for f, m in bars.items()}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.deviation = np.abs(bars["close"] - self.consensus["close"]) / self.consensus["close"]
+
+    @property
+    def dates(self):
+        """The calendar days as datetime64[D]."""
+        return self.days.astype("datetime64[D]")
+
+    def summary(self):
+        """
+        Scores every (symbol, provider) pair.
+
+        Returns:
+        DataFrame: Indexed by (symbol, provider) with columns
+            days: calendar days of the symbol
+            bars: bars the provider has in the window, on or off the calendar
+            missing: calendar days the provider has no bar for
+            extra: bars on days too few other providers have
+            deviations: bars whose close is off the consensus by more than the tolerance
+            mean_deviation: mean relative distance from the consensus close
+            lag: calendar days after the provider's last bar
+            stale: lag is over max_lag
+        """
+        n_symbols = len(self.symbols)
+        days = np.bincount(self.symbol_of, minlength=n_symbols)
+        positions = np.arange(len(self.keys))
+        symbol_last = np.full(n_symbols, -1)
+        np.maximum.at(symbol_last, self.symbol_of, positions)
+        symbol_first = np.maximum(symbol_last - days + 1, 0)
+        # Symbols with no calendar days index a placeholder day and get a lag of 0 below
+        epoch_days = self.days if len(self.days) else np.zeros(1, dtype="int64")
+        last_day = epoch_days[np.maximum(symbol_last, 0)]
+
+        frames = []
+        for p, provider in enumerate(self.providers):
+            present = self.present[p]
+            have = np.bincount(self.symbol_of, weights=present, minlength=n_symbols).astype("int64")
+            deviates = np.nan_to_num(self.deviation[p]) > self.tolerance
+            deviations = np.bincount(self.symbol_of, weights=deviates, minlength=n_symbols).astype("int64")
+            with np.errstate(invalid="ignore", divide="ignore"):
+                total_deviation = np.bincount(self.symbol_of, weights=np.nan_to_num(self.deviation[p]), minlength=n_symbols)
+                mean_deviation = np.where(have > 0, total_deviation / np.maximum(have, 1), np.nan)
+            # Each symbol's calendar days are one sorted run, so its last row holds its last day.
+            # A provider with no bars trails by the whole window, counted from the day before it.
+            provider_last = np.full(n_symbols, -1)
+            np.maximum.at(provider_last, self.symbol_of[present], positions[present])
+            trailing = np.where(provider_last >= 0, provider_last, symbol_first)
+            lag = np.where(days > 0, last_day - epoch_days[trailing] + (provider_last < 0), 0)
+            frames.append(pd.DataFrame({
+                "symbol": self.symbols,
+                "provider": provider,
+                "days": days,
+                "bars": have + self.extra[p],
+                "missing": days - have,
+                "extra": self.extra[p],
+                "deviations": deviations,
+                "mean_deviation": mean_deviation,
+                "lag": lag,
+                "stale": lag > self.max_lag,
+            }))
+        if not frames:
+            frames.append(pd.DataFrame(columns=["symbol", "provider", "days", "bars", "missing", "extra",
+                                                "deviations", "mean_deviation", "lag", "stale"]))
+        return pd.concat(frames, ignore_index=True).set_index(["symbol", "provider"]).sort_index()
+
+    def best_feeds(self):
+        """
+        Picks the most trustworthy provider for every symbol.
+
+        What the code does:
+        - Ranks each symbol's providers by staleness, then by missing plus deviating days,
+          then by mean deviation from the consensus.
+        - Keeps the top provider per symbol. Ties go to the order of `providers`.
+
+        Returns:
+        Series: Provider name indexed by symbol.
+        """
+        scores = self.summary().reset_index()
+        scores["problems"] = scores["missing"] + scores["deviations"]
+        scores["order"] = scores["provider"].map({p: i for i, p in enumerate(self.providers)})
+        scores = scores[scores["bars"] > 0].sort_values(
+            ["symbol", "stale", "problems", "mean_deviation", "order"], na_position="last"
+        )
+        return scores.groupby("symbol", sort=True)["provider"].first()
+
+    def aligned(self, symbol, field="close"):
+        """
+        Returns one symbol's field from every provider side by side, plus the consensus.
+
+        Returns:
+        DataFrame: Indexed by date with one column per provider and a "consensus" column.
+        """
+        where = np.searchsorted(self.symbols, symbol)
+        if where >= len(self.symbols) or self.symbols[where] != symbol:
+            return pd.DataFrame(columns=self.providers + ["consensus"], index=pd.DatetimeIndex([], name="date"))
+        lo, hi = np.searchsorted(self.symbol_of, [where, where + 1])
+        frame = pd.DataFrame(self.bars[field][:, lo:hi].T, columns=self.providers,
+                             index=pd.DatetimeIndex(self.dates[lo:hi].astype("datetime64[ns]"), name="date"))
+        frame["consensus"] = self.consensus[field][lo:hi]
+        return frame
+
+def reconcile(stores, symbols=None, start_date=None, end_date=None, quorum=None,
+              tolerance=DEFAULT_TOLERANCE, max_lag=DEFAULT_MAX_LAG):
+    """
+    Aligns every provider's bars on a shared trading calendar in one vectorized pass.
+
+    Parameters:
+    stores (dict): Provider name mapped to a BarStore, e.g. Dataset.stores or BarStore.from_sqlite.
+    symbols (list, optional): Only these symbols. Default is every symbol any provider has.
+    start_date (str, optional): Only bars on or after this "YYYY-MM-DD" date.
+    end_date (str, optional): Only bars on or before this "YYYY-MM-DD" date.
+    quorum (int, optional): How many providers must have a day for it to be on the calendar.
+        Default is a majority of the providers that have any bars for that symbol. 1 takes the
+        union of every provider's days.
+    tolerance (float): Relative close difference counted as a deviation. Default is DEFAULT_TOLERANCE.
+    max_lag (int): Calendar days a source may trail the calendar before it is stale.
+        Default is DEFAULT_MAX_LAG.
+
+    What the code does:
+    - Encodes every bar as an int64 (symbol, date) key. The stores are already sorted by
+      symbol and date, so each provider's keys come out sorted without a sort.
+    - Builds the calendar from np.unique over all keys, keeping the days enough providers have.
+    - Merges each provider into the calendar with one np.searchsorted, scattering its
+      fields into (providers, days) matrices.
+    - Computes the median consensus and each provider's deviation from it across all
+      symbols and dates at once.
+
+    Returns:
+    Reconciliation: The aligned bars, flags and consensus.
+    """
+    providers = list(stores)
+    names = sorted({s for store in stores.values() for s in store.symbols})
+    if symbols is not None:
+        wanted = set(symbols)
+        names = [s for s in names if s in wanted]
+    universe = np.array(names, dtype=object)
+    code_of = {s: i for i, s in enumerate(names)}
+    start = None if start_date is None else to_days([start_date])[0]
+    end = None if end_date is None else to_days([end_date])[0]
+
+    keys, values = [], []
+    active = np.zeros(len(names), dtype="int64")
+    for provider in providers:
+        store = stores[provider]
+        store_codes = np.array([code_of.get(s, -1) for s in store.symbols], dtype="int64")
+        codes = np.repeat(store_codes, np.diff(store.offsets))
+        dates = np.asarray(store.dates)
+        keep = codes >= 0
+        if start is not None:
+            keep &= dates >= start
+        if end is not None:
+            keep &= dates <= end
+        provider_keys = _encode(codes[keep], dates[keep])
+        keys.append(provider_keys)
+        values.append({f: np.asarray(store.columns[f])[keep] for f in FIELDS})
+        active[np.unique(codes[keep])] += 1
+
+    all_keys = np.concatenate(keys) if keys else np.empty(0, dtype="int64")
+    candidates, counts = np.unique(all_keys, return_counts=True)
+    if quorum is None:
+        needed = active[(candidates >> 32).astype("int64")] // 2 + 1
+    else:
+        needed = quorum
+    calendar = candidates[counts >= needed]
+
+    bars = {f: np.full((len(providers), len(calendar)), np.nan) for f in FIELDS}
+    present = np.zeros((len(providers), len(calendar)), dtype=bool)
+    extra = np.zeros((len(providers), len(names)), dtype="int64")
+    for p, (provider_keys, provider_values) in enumerate(zip(keys, values)):
+        slot = np.searchsorted(calendar, provider_keys)
+        hit = slot < len(calendar)
+        hit[hit] = calendar[slot[hit]] == provider_keys[hit]
+        present[p, slot[hit]] = True
+        for f in FIELDS:
+            bars[f][p, slot[hit]] = provider_values[f][hit]
+        extra[p] = np.bincount((provider_keys[~hit] >> 32).astype("int64"), minlength=len(names))
+
+    return Reconciliation(providers, universe, calendar, bars, present, extra, tolerance, max_lag)
+
+def reconcile_database(db_name=DB_NAME, providers=None, start_date=None, **kwargs):
+    """
+    Reconciles the daily bars stored in stocks.db. Keyword arguments go to reconcile().
+    """
+    with get_read_pool(db_name).connection() as conn:
+        if providers is None:
+            providers = [name for (name,) in conn.execute("""
+                SELECT name FROM providers
+                WHERE EXISTS (SELECT 1 FROM daily_bars WHERE daily_bars.provider_id = providers.id)
+                ORDER BY id
+            """)]
+        stores = {p: BarStore.from_sqlite(conn, p, start_date) for p in providers}
+    return reconcile(stores, start_date=start_date, **kwargs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare providers' stored daily bars and pick the best feed per symbol")
+    parser.add_argument("--start-date", default=None)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--summary", action="store_true", help="print every (symbol, provider) score")
+    args = parser.parse_args()
+
+    result = reconcile_database(start_date=args.start_date, tolerance=args.tolerance)
+    if args.summary:
+        print(result.summary().to_string())
+    print(result.best_feeds().to_string())
@@ -0,0 +1,132 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from dataset import DATASET_DB
+
+# Worker processes inherit this, so matplotlib never tries to open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# Chart name mapped to (visualize function, whether it is drawn once per symbol,
+# whether it renders from the dataset snapshot)
+CHARTS = {
+    "high_low_avg": ("plot_high_low_avg_comparison", True, True),
+    "timestamp_coverage": ("plot_timestamp_coverage", True, True),
+    "volatility": ("plot_volatility_comparison", False, True),
+    "success_count": ("plot_success_count", False, True),
+    "api_latency": ("plot_api_latency", False, False),
+}
+
+# The snapshot each worker loads once and shares across all of its charts
+_dataset = None
+
+def _init_worker(output_dir, dataset_path):
+    """
+    Runs once in every worker process: selects the Agg backend, pays for the
+    matplotlib, seaborn and pandas imports and loads the dataset snapshot up front
+    instead of inside each chart.
+    """
+    global _dataset
+    import matplotlib
+    matplotlib.use("Agg")
+    # visualize binds these lazily, so load them here rather than in the first chart
+    import matplotlib.pyplot
+    # Imported only to pre-load the modules in each worker
+    import pandas  # noqa: F401
+    import seaborn  # noqa: F401
+    import visualize
+    from dataset import load_dataset
+    visualize.OUTPUT_DIR = output_dir
+    _dataset = load_dataset(dataset_path)
+
+def _render(chart, kwargs):
+    """
+    Draws one chart without displaying it and returns how long it took.
+    """
+    import visualize
+    name, _, uses_dataset = CHARTS[chart]
+    if uses_dataset:
+        kwargs = dict(kwargs, dataset=_dataset)
+    start = time.perf_counter()
+    getattr(visualize, name)(show=False, **kwargs)
+    return time.perf_counter() - start
+
+def make_tasks(symbols, charts=tuple(CHARTS), days=7):
+    """
+    Builds the (chart, kwargs) tasks for every requested chart and symbol.
+
+    Parameters:
+    symbols (list): Stock ticker symbols for the per-symbol charts.
+    charts (iterable): Names from CHARTS. Default is all of them.
+    days (int): Date range of the high-low chart, ending today. Default is 7.
+
+    Returns:
+    list: Tuples of (chart name, keyword arguments for the plot function).
+    """
+    end = datetime.now()
+    start_date = (end - timedelta(days=days)).strftime('%Y-%m-%d')
+    end_date = end.strftime('%Y-%m-%d')
+    tasks = []
+    for chart in charts:
+        _, per_symbol, _ = CHARTS[chart]
+        if not per_symbol:
+            tasks.append((chart, {}))
+        elif chart == "high_low_avg":
+            tasks.extend((chart, {"symbol": s, "start_date": start_date, "end_date": end_date}) for s in symbols)
+        else:
+            tasks.extend((chart, {"symbol": s}) for s in symbols)
+    return tasks
+
+def render_batch(tasks, workers=None, output_dir="output_images", dataset_path=DATASET_DB):
+    """
+    Renders many charts to PNG files in parallel with no display.
+
+    Parameters:
+    tasks (list): (chart, kwargs) tuples, e.g. from make_tasks.
+    workers (int, optional): Number of worker processes. Default is the CPU count.
+    output_dir (str): Directory the PNGs are written to. Default is "output_images".
+    dataset_path (str): Snapshot from dataset.collect_dataset. Default is DATASET_DB.
+
+    What the code does:
+    - Starts a process pool whose workers import the plotting stack and load the snapshot once at startup.
+    - Submits every chart and yields results as they finish.
+
+    Returns:
+    generator: Tuples of (task, seconds, error). error is None when the chart was written.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(output_dir, dataset_path)) as pool:
+        futures = {pool.submit(_render, chart, kwargs): (chart, kwargs) for chart, kwargs in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                yield task, future.result(), None
+            except Exception as e:
+                yield task, None, e
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render charts to PNG files in parallel")
+    parser.add_argument("symbols", nargs="*", default=["AAPL"])
+    parser.add_argument("--charts", nargs="+", default=list(CHARTS), choices=list(CHARTS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output-dir", default="output_images")
+    parser.add_argument("--dataset", default=DATASET_DB, help="snapshot file the charts render from")
+    parser.add_argument("--collect", action="store_true", help="refresh the snapshot before rendering")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.collect:
+        from dataset import collect_dataset
+        collect_dataset(args.symbols, path=args.dataset)
+        print(f"Collected snapshot in {time.perf_counter() - start:.2f}s")
+    tasks = make_tasks(args.symbols, args.charts)
+    failed = 0
+    for (chart, kwargs), seconds, error in render_batch(tasks, args.workers, args.output_dir, args.dataset):
+        label = f"{chart} {kwargs.get('symbol', '')}".strip()
+        if error is not None:
+            failed += 1
+            print(f"{label} failed: {error}")
+        else:
+            print(f"{label} rendered in {seconds:.2f}s")
+    print(f"Rendered {len(tasks) - failed}/{len(tasks)} charts in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,306 @@
+import argparse
+import json
+import sqlite3
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from db_setup import DB_NAME, PROVIDERS, migrate
+from metrics import instrument, registry
+
+#### RETENTION POLICIES: ####
+
+# keep_weeks: weeks of weekly bars kept, in both weekly_data and weekly_bars. None keeps them all.
+# daily_days: days of daily bars kept. None keeps them all.
+# downsample: fold daily bars older than daily_days into weekly_bars rather than only deleting them.
+RetentionPolicy = namedtuple("RetentionPolicy", ["keep_weeks", "daily_days", "downsample"], defaults=[None, None, True])
+
+# Ten years of weekly bars, and two years of daily bars (as much as db_insert backfills)
+DEFAULT_POLICY = RetentionPolicy(keep_weeks=520, daily_days=2 * 365, downsample=True)
+
+# Policies keyed by (provider, symbol); either may be None to match any, and the most specific
+# match wins. weekly_data holds Alpha Vantage's series, so it is looked up as "alpha_vantage".
+POLICIES = {(None, None): DEFAULT_POLICY}
+
+# Rows removed per transaction, so the ingest writer gets the lock between batches
+RETENTION_BATCH_ROWS = 5000
+
+def policy_for(policies, provider, symbol):
+    """
+    Returns the policy for a (provider, symbol) pair, falling back from the most specific key.
+    """
+    for key in ((provider, symbol), (provider, None), (None, symbol), (None, None)):
+        if key in policies:
+            return policies[key]
+    return DEFAULT_POLICY
+
+def _cutoff(today, days):
+    # Bars dated before the Monday of the week `days` ago are expired. Cutting on a week
+    # boundary means a week is never split between kept daily bars and a downsampled bar.
+    day = today - timedelta(days=days)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+#### BATCHED RANGE DELETES: ####
+
+def _batch_bound(conn, table, key_sql, key_params, cutoff, batch_rows):
+    """
+    Returns the date that ends the next batch of expired rows, found by walking the key's
+    (.., date) index, or the cutoff itself when fewer than batch_rows rows remain.
+    """
+    row = conn.execute(
+        f"SELECT date FROM {table} WHERE {key_sql} AND date < ? ORDER BY date LIMIT 1 OFFSET ?",
+        (*key_params, cutoff, batch_rows)
+    ).fetchone()
+    return cutoff if row is None else row[0]
+
+def _any_before(conn, table, key_sql, key_params, cutoff):
+    # One index seek, so keys with nothing expired never take the write lock
+    return conn.execute(
+        f"SELECT 1 FROM {table} WHERE {key_sql} AND date < ? LIMIT 1", (*key_params, cutoff)
+    ).fetchone() is not None
+
+def delete_before(conn, table, key_sql, key_params, cutoff, batch_rows=RETENTION_BATCH_ROWS):
+    """
+    Deletes one key's rows dated before `cutoff`, oldest first, in transactions of about batch_rows.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    table (str): 'weekly_data', 'daily_bars' or 'weekly_bars'.
+    key_sql (str): The condition that selects one key, e.g. "stock_id = ?". Together with the
+        date it must match an index, so every batch is a range on that index.
+    key_params (tuple): Parameters of key_sql.
+    cutoff (str): First "YYYY-MM-DD" date to keep.
+    batch_rows (int): Rows deleted per transaction. Default is RETENTION_BATCH_ROWS.
+
+    Returns:
+    int: Rows deleted.
+    """
+    deleted = 0
+    while _any_before(conn, table, key_sql, key_params, cutoff):
+        bound = _batch_bound(conn, table, key_sql, key_params, cutoff, batch_rows)
+        with conn:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE {key_sql} AND date < ?", (*key_params, bound)
+            ).rowcount
+    if deleted:
+        registry.inc("rows_deleted_total", deleted, table=table)
+    return deleted
+
+#### DOWNSAMPLING: ####
+
+def _week_ending(day):
+    # Weekly bars are dated on the week's Friday, as Alpha Vantage dates weekly_data
+    d = datetime.strptime(day, '%Y-%m-%d').date()
+    return (d + timedelta(days=4 - d.weekday())).isoformat()
+
+def weekly_from_daily(rows):
+    """
+    Folds daily (date, open, high, low, close, volume) rows, sorted by date, into weekly bars.
+
+    Returns:
+    list: Tuples of (week-ending Friday, open, high, low, close, volume): the first open,
+    highest high, lowest low, last close and total volume of each week.
+    """
+    weeks = []
+    for day, o, h, l, c, v in rows:
+        week = _week_ending(day)
+        if not weeks or weeks[-1][0] != week:
+            weeks.append([week, o, h, l, c, v])
+            continue
+        bar = weeks[-1]
+        if bar[1] is None:
+            bar[1] = o
+        if h is not None:
+            bar[2] = h if bar[2] is None else max(bar[2], h)
+        if l is not None:
+            bar[3] = l if bar[3] is None else min(bar[3], l)
+        if c is not None:
+            bar[4] = c
+        if v is not None:
+            bar[5] = v if bar[5] is None else bar[5] + v
+    return [tuple(bar) for bar in weeks]
+
+def downsample_before(conn, stock_id, provider_id, cutoff, batch_rows=RETENTION_BATCH_ROWS):
+    """
+    Moves one (symbol, provider)'s daily bars dated before `cutoff` into weekly_bars.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    stock_id (int): The stock's id.
+    provider_id (int): The provider's id.
+    cutoff (str): First "YYYY-MM-DD" date kept as daily bars. Must be a Monday.
+    batch_rows (int): Daily rows handled per transaction. Default is RETENTION_BATCH_ROWS.
+
+    What the code does:
+    - Finds each batch's end on the daily_bars primary key and extends it to the next Monday,
+      so a week is always folded in one piece.
+    - In one transaction per batch, reads the batch's daily bars, upserts their weekly bars and
+      deletes them. A week folded again replaces its earlier weekly bar.
+
+    Returns:
+    tuple: (daily rows deleted, weekly bars written).
+    """
+    key_sql, key_params = "stock_id = ? AND provider_id = ?", (stock_id, provider_id)
+    deleted = written = 0
+    while _any_before(conn, "daily_bars", key_sql, key_params, cutoff):
+        bound = _batch_bound(conn, "daily_bars", key_sql, key_params, cutoff, batch_rows)
+        if bound != cutoff:
+            monday = datetime.strptime(bound, '%Y-%m-%d').date()
+            monday += timedelta(days=7 - monday.weekday())
+            bound = min(monday.isoformat(), cutoff)
+        with conn:
+            # Lock before reading, so no bar can land in the batch between the read and the delete
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(f"""
+                SELECT date, open, high, low, close, volume FROM daily_bars
+                WHERE {key_sql} AND date < ? ORDER BY date
+            """, (*key_params, bound)).fetchall()
+            weeks = weekly_from_daily(rows)
+            conn.executemany("""
+                INSERT INTO weekly_bars (stock_id, provider_id, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(stock_id, provider_id, date) DO UPDATE SET
+                    open = excluded.open, high = excluded.high, low = excluded.low,
+                    close = excluded.close, volume = excluded.volume
+            """, [(stock_id, provider_id, *week) for week in weeks])
+            deleted += conn.execute(
+                f"DELETE FROM daily_bars WHERE {key_sql} AND date < ?", (*key_params, bound)
+            ).rowcount
+            written += len(weeks)
+    if deleted:
+        registry.inc("rows_deleted_total", deleted, table="daily_bars")
+        registry.inc("rows_written_total", written, table="weekly_bars")
+    return deleted, written
+
+#### COMPACTION: ####
+
+def enable_incremental_vacuum(conn):
+    """
+    Switches the database to auto_vacuum=INCREMENTAL so freed pages can be returned later
+    without rewriting the whole file.
+
+    The mode of an existing database only changes with one full VACUUM, which runs here the
+    first time and is skipped once the mode is set.
+
+    Returns:
+    bool: True if the database was converted now.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+def compact(conn, pages=None):
+    """
+    Returns free pages to the filesystem and refreshes the planner's statistics.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    pages (int, optional): Most pages to release. Default releases every free page.
+
+    What the code does:
+    - Runs PRAGMA incremental_vacuum, which truncates free pages off the end of the file.
+    - Checkpoints and truncates the WAL, which the deletes grew.
+    - Runs ANALYZE the first time, then PRAGMA optimize, which only re-analyzes tables whose
+      statistics have drifted.
+
+    Returns:
+    int: Pages released.
+    """
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # The pragma frees one page per step and has no result columns, so execute() would stop
+    # after the first page. executescript() steps it to completion.
+    conn.executescript("PRAGMA incremental_vacuum" + ("" if pages is None else f"({int(pages)})") + ";")
+    released = free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    if analyzed is None:
+        conn.execute("ANALYZE")
+    else:
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("PRAGMA optimize").fetchall()
+    return released
+
+#### RETENTION JOB: ####
+
+@instrument("retention")
+def run_retention(db_name=DB_NAME, policies=None, batch_rows=RETENTION_BATCH_ROWS, vacuum=True, today=None):
+    """
+    Applies the retention policies to every stored symbol and compacts the database.
+
+    Parameters:
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    policies (dict, optional): Policies keyed by (provider, symbol). Default is POLICIES.
+    batch_rows (int): Rows deleted per transaction. Default is RETENTION_BATCH_ROWS.
+    vacuum (bool): Release freed pages and refresh statistics afterwards. Default is True.
+    today (date, optional): The day the cutoffs count back from. Default is today.
+
+    What the code does:
+    - Deletes each symbol's weekly_data older than its keep_weeks, through the (stock_id, date) index.
+    - For each (symbol, provider), downsamples or deletes daily bars older than daily_days,
+      then deletes weekly_bars older than keep_weeks, through their primary keys.
+    - Converts the database to incremental auto-vacuum once, then runs compact().
+
+    Returns:
+    dict: Rows deleted per table, weekly bars written and pages released.
+    """
+    policies = POLICIES if policies is None else policies
+    today = today or date.today()
+    report = {"weekly_data": 0, "daily_bars": 0, "weekly_bars": 0, "weekly_bars_written": 0, "pages_released": 0}
+
+    conn = sqlite3.connect(db_name, timeout=30)
+    try:
+        migrate(conn)
+        conn.execute("PRAGMA journal_mode=WAL")
+        stocks = conn.execute("SELECT id, symbol FROM stocks ORDER BY id").fetchall()
+        providers = dict(conn.execute("SELECT name, id FROM providers"))
+
+        for stock_id, symbol in stocks:
+            policy = policy_for(policies, "alpha_vantage", symbol)
+            if policy.keep_weeks is not None:
+                report["weekly_data"] += delete_before(
+                    conn, "weekly_data", "stock_id = ?", (stock_id,),
+                    _cutoff(today, 7 * policy.keep_weeks), batch_rows
+                )
+            for provider in PROVIDERS:
+                provider_id = providers[provider]
+                policy = policy_for(policies, provider, symbol)
+                if policy.daily_days is not None:
+                    cutoff = _cutoff(today, policy.daily_days)
+                    if policy.downsample:
+                        deleted, written = downsample_before(conn, stock_id, provider_id, cutoff, batch_rows)
+                        report["weekly_bars_written"] += written
+                    else:
+                        deleted = delete_before(
+                            conn, "daily_bars", "stock_id = ? AND provider_id = ?",
+                            (stock_id, provider_id), cutoff, batch_rows
+                        )
+                    report["daily_bars"] += deleted
+                if policy.keep_weeks is not None:
+                    report["weekly_bars"] += delete_before(
+                        conn, "weekly_bars", "stock_id = ? AND provider_id = ?",
+                        (stock_id, provider_id), _cutoff(today, 7 * policy.keep_weeks), batch_rows
+                    )
+
+        if vacuum:
+            enable_incremental_vacuum(conn)
+            report["pages_released"] = compact(conn)
+    finally:
+        conn.close()
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expire old bars, downsample old daily bars and compact stocks.db")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--keep-weeks", type=int, default=DEFAULT_POLICY.keep_weeks)
+    parser.add_argument("--daily-days", type=int, default=DEFAULT_POLICY.daily_days)
+    parser.add_argument("--no-downsample", action="store_true", help="delete old daily bars instead of folding them into weeks")
+    parser.add_argument("--batch-rows", type=int, default=RETENTION_BATCH_ROWS)
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    policy = RetentionPolicy(args.keep_weeks, args.daily_days, not args.no_downsample)
+    policies = dict(POLICIES)
+    policies[(None, None)] = policy
+    report = run_retention(args.db, policies, args.batch_rows, vacuum=not args.no_vacuum)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,151 @@
+#### PER-SYMBOL ROLLUPS OF WEEKLY DATA: ####
+
+# weekly_rollups keeps one row per stock with running totals of its closing prices.
+# Triggers on weekly_data update it on every insert, update and delete, so summary
+# queries read one row per symbol instead of scanning the whole history.
+# Rows with a NULL close (NaN is stored as NULL) are left out, as AVG/MIN/MAX leave them out.
+
+def _add(row):
+    # Statement that folds the `row` (NEW) of weekly_data into its stock's rollup
+    return f"""
+        INSERT INTO weekly_rollups (stock_id, row_count, sum_close, min_close, max_close, last_date, last_close)
+        SELECT {row}.stock_id, 1, {row}.close, {row}.close, {row}.close, {row}.date, {row}.close
+        WHERE {row}.close IS NOT NULL
+        ON CONFLICT(stock_id) DO UPDATE SET
+            row_count = row_count + 1,
+            sum_close = sum_close + excluded.sum_close,
+            min_close = MIN(COALESCE(min_close, excluded.min_close), excluded.min_close),
+            max_close = MAX(COALESCE(max_close, excluded.max_close), excluded.max_close),
+            last_date = CASE WHEN last_date IS NULL OR excluded.last_date >= last_date
+                             THEN excluded.last_date ELSE last_date END,
+            last_close = CASE WHEN last_date IS NULL OR excluded.last_date >= last_date
+                              THEN excluded.last_close ELSE last_close END;
+    """
+
+def _remove(row):
+    # Statement that takes the `row` (OLD) of weekly_data back out of its stock's rollup.
+    # Min, max and last only need a lookup when the removed row was the extreme one, and
+    # that lookup is a single seek on the (stock_id, close) or (stock_id, date) index.
+    return f"""
+        UPDATE weekly_rollups SET
+            row_count = row_count - 1,
+            sum_close = sum_close - {row}.close,
+            min_close = CASE WHEN {row}.close <= min_close
+                             THEN (SELECT MIN(close) FROM weekly_data WHERE stock_id = {row}.stock_id)
+                             ELSE min_close END,
+            max_close = CASE WHEN {row}.close >= max_close
+                             THEN (SELECT MAX(close) FROM weekly_data WHERE stock_id = {row}.stock_id)
+                             ELSE max_close END,
+            last_date = CASE WHEN {row}.date >= last_date
+                             THEN (SELECT MAX(date) FROM weekly_data
+                                   WHERE stock_id = {row}.stock_id AND close IS NOT NULL)
+                             ELSE last_date END,
+            last_close = CASE WHEN {row}.date >= last_date
+                              THEN (SELECT close FROM weekly_data
+                                    WHERE stock_id = {row}.stock_id AND close IS NOT NULL
+                                    ORDER BY date DESC LIMIT 1)
+                              ELSE last_close END
+        WHERE stock_id = {row}.stock_id AND {row}.close IS NOT NULL;
+    """
+
+REBUILD_SQL = """
+    INSERT OR REPLACE INTO weekly_rollups (stock_id, row_count, sum_close, min_close, max_close, last_date, last_close)
+    SELECT stock_id, COUNT(close), SUM(close), MIN(close), MAX(close), MAX(date),
+           (SELECT close FROM weekly_data AS latest
+            WHERE latest.stock_id = weekly_data.stock_id AND latest.close IS NOT NULL
+            ORDER BY date DESC LIMIT 1)
+    FROM weekly_data
+    WHERE close IS NOT NULL
+    GROUP BY stock_id
+"""
+
+# Statements run by the db_setup migration that introduces rollups
+ROLLUP_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS weekly_rollups (
+        stock_id INTEGER PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        sum_close REAL NOT NULL DEFAULT 0,
+        min_close REAL,
+        max_close REAL,
+        last_date TEXT,
+        last_close REAL,
+        FOREIGN KEY (stock_id) REFERENCES stocks(id)
+    )
+    """,
+    "CREATE TRIGGER IF NOT EXISTS weekly_rollups_insert AFTER INSERT ON weekly_data BEGIN"
+    + _add("NEW") + "END",
+    "CREATE TRIGGER IF NOT EXISTS weekly_rollups_delete AFTER DELETE ON weekly_data BEGIN"
+    + _remove("OLD") + "END",
+    "CREATE TRIGGER IF NOT EXISTS weekly_rollups_update AFTER UPDATE OF stock_id, date, close ON weekly_data BEGIN"
+    + _remove("OLD") + _add("NEW") + "END",
+    REBUILD_SQL,
+]
+
+def rebuild_rollups(conn):
+    """
+    Recomputes every rollup from weekly_data.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+
+    What the code does:
+    - Clears weekly_rollups and refills it with one grouped scan of weekly_data.
+    - Useful after bulk edits made with the triggers dropped, or to reset floating point
+      drift in the running sums.
+
+    Returns:
+    None
+    """
+    with conn:
+        conn.execute("DELETE FROM weekly_rollups")
+        conn.execute(REBUILD_SQL)
+
+def read_rollups(conn):
+    """
+    Returns the summary of every symbol that has weekly data.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+
+    Returns:
+    list: Dictionaries with symbol, count, avg_close, min_close, max_close, last_date and
+    last_close, ordered by symbol. count and last_date only cover weeks with a close.
+    """
+    cur = conn.execute("""
+        SELECT stocks.symbol, row_count, sum_close / row_count, min_close, max_close, last_date, last_close
+        FROM weekly_rollups
+        JOIN stocks ON weekly_rollups.stock_id = stocks.id
+        WHERE row_count > 0
+        ORDER BY stocks.symbol
+    """)
+    keys = ["symbol", "count", "avg_close", "min_close", "max_close", "last_date", "last_close"]
+    return [dict(zip(keys, row)) for row in cur]
+
+def rolling_averages(conn, window=4):
+    """
+    Returns each symbol's average close over its most recent `window` weeks.
+
+    Parameters:
+    conn (sqlite3.Connection): An open database connection.
+    window (int): Number of most recent weeks to average. Default is 4.
+
+    What the code does:
+    - For every symbol in weekly_rollups, reads only the newest `window` rows through the
+      (stock_id, date) index, so the cost grows with symbols times window, not with history.
+
+    Returns:
+    dict: A mapping of symbol to its rolling average close.
+    """
+    cur = conn.execute("""
+        SELECT stocks.symbol,
+               (SELECT AVG(close) FROM (
+                    SELECT close FROM weekly_data
+                    WHERE weekly_data.stock_id = weekly_rollups.stock_id
+                    ORDER BY date DESC LIMIT ?))
+        FROM weekly_rollups
+        JOIN stocks ON weekly_rollups.stock_id = stocks.id
+        WHERE row_count > 0
+        ORDER BY stocks.symbol
+    """, (window,))
+    return dict(cur.fetchall())
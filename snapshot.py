@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import struct
+from datetime import datetime
+
+import numpy as np
+
+from barstore import FIELDS, BarStore
+from db_access import get_read_pool
+from db_setup import DB_NAME
+
+#### BINARY SNAPSHOT FORMAT: ####
+
+# File layout, all integers little-endian:
+#   8 bytes   MAGIC
+#   4 bytes   format version (uint32)
+#   4 bytes   header length in bytes (uint32)
+#   header    UTF-8 JSON: for every dataset its symbols, row offsets and the byte
+#             offset of each column in this file
+#   columns   raw int64 dates and float64 values, each starting on an ALIGNMENT boundary
+# Nothing after the header needs parsing: every column is opened in place with numpy.memmap.
+
+MAGIC = b"BARSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+SNAPSHOT_PATH = os.getenv("BAR_SNAPSHOT", "stocks.barsnap")
+
+def _aligned(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+def write_snapshot(stores, path=SNAPSHOT_PATH, source=None):
+    """
+    Writes BarStores into one snapshot file.
+
+    Parameters:
+    stores (dict): Dataset name mapped to a BarStore, e.g. {"weekly": ..., "polygon": ...}.
+    path (str): The snapshot file. Default is SNAPSHOT_PATH.
+    source (str, optional): Where the bars came from, recorded in the header.
+
+    What the code does:
+    - Lays out every column of every store at an aligned byte offset and records it in the header.
+    - Writes to a temporary file and renames it over `path`, so readers never see half a snapshot.
+
+    Returns:
+    int: The size of the file in bytes.
+    """
+    datasets = {}
+    columns = []
+    # The header size depends on the offsets inside it, so lay out the columns from a
+    # placeholder position and shift them once the header is encoded
+    position = 0
+    for name, store in stores.items():
+        layout = {}
+        for field, array in [("dates", store.dates)] + [(f, store.columns[f]) for f in FIELDS]:
+            array = np.ascontiguousarray(array, dtype="<i8" if field == "dates" else "<f8")
+            position = _aligned(position)
+            layout[field] = position
+            columns.append((position, array))
+            position += array.nbytes
+        datasets[name] = {
+            "symbols": store.symbols,
+            "offsets": [int(o) for o in store.offsets],
+            "rows": int(len(store.dates)),
+            "columns": layout,
+        }
+
+    header = {
+        "version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "fields": FIELDS,
+        "datasets": datasets,
+    }
+    # Fix the data start, then re-encode until the header fits in front of it
+    data_start = _aligned(_PREAMBLE.size + len(json.dumps(header)))
+    while True:
+        header["data_start"] = data_start
+        encoded = json.dumps(header).encode("utf-8")
+        if _PREAMBLE.size + len(encoded) <= data_start:
+            break
+        data_start = _aligned(_PREAMBLE.size + len(encoded))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        for offset, array in columns:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+def read_header(path=SNAPSHOT_PATH):
+    """
+    Reads and checks a snapshot's header without touching the columns.
+
+    Raises:
+    ValueError: If the file is not a snapshot or was written by a newer format version.
+    """
+    with open(path, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError(f"{path} is not a bar snapshot")
+        magic, version, length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a bar snapshot")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses snapshot format {version}; this code reads up to {FORMAT_VERSION}")
+        return json.loads(f.read(length).decode("utf-8"))
+
+def load_snapshot(path=SNAPSHOT_PATH, datasets=None):
+    """
+    Opens a snapshot as BarStores backed by numpy.memmap.
+
+    Parameters:
+    path (str): The snapshot file. Default is SNAPSHOT_PATH.
+    datasets (list, optional): Names to open. Default is every dataset in the file.
+
+    What the code does:
+    - Parses only the JSON header.
+    - Maps each column read-only at its recorded offset. No bar is read until it is used,
+      and processes that open the same file share the page cache.
+
+    Returns:
+    dict: Dataset name mapped to a BarStore.
+    """
+    header = read_header(path)
+    data_start = header["data_start"]
+    stores = {}
+    for name, meta in header["datasets"].items():
+        if datasets is not None and name not in datasets:
+            continue
+        rows = meta["rows"]
+
+        def column(field, dtype):
+            if rows == 0:
+                return np.empty(0, dtype=dtype)
+            return np.memmap(path, dtype=dtype, mode="r", offset=data_start + meta["columns"][field], shape=(rows,))
+
+        stores[name] = BarStore(
+            meta["symbols"],
+            np.array(meta["offsets"], dtype="int64"),
+            column("dates", "<i8"),
+            {f: column(f, "<f8") for f in FIELDS},
+        )
+    return stores
+
+def export_snapshot(path=SNAPSHOT_PATH, db_name=DB_NAME, providers=None, start_date=None):
+    """
+    Exports the stored bars of stocks.db into a snapshot file.
+
+    Parameters:
+    path (str): The snapshot file. Default is SNAPSHOT_PATH.
+    db_name (str): Path to the SQLite database. Default is DB_NAME.
+    providers (list, optional): Daily providers to include. Default is every provider with bars.
+    start_date (str, optional): Only bars on or after this "YYYY-MM-DD" date.
+
+    What the code does:
+    - Loads 'weekly_data' as the "weekly" dataset and each provider's 'daily_bars' as a dataset
+      named after the provider, each with one ordered query through BarStore.from_sqlite.
+    - Writes them all with write_snapshot.
+
+    Returns:
+    dict: Dataset name mapped to its number of rows.
+    """
+    with get_read_pool(db_name).connection() as conn:
+        # One read transaction, so every dataset comes from the same state of the database
+        conn.execute("BEGIN")
+        if providers is None:
+            providers = [name for (name,) in conn.execute("""
+                SELECT name FROM providers
+                WHERE EXISTS (SELECT 1 FROM daily_bars WHERE daily_bars.provider_id = providers.id)
+                ORDER BY name
+            """)]
+        stores = {"weekly": BarStore.from_sqlite(conn, start_date=start_date)}
+        for provider in providers:
+            stores[provider] = BarStore.from_sqlite(conn, provider, start_date)
+    write_snapshot(stores, path, source=os.path.abspath(db_name))
+    return {name: len(store.dates) for name, store in stores.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or inspect a memory-mapped bar snapshot")
+    parser.add_argument("path", nargs="?", default=SNAPSHOT_PATH)
+    parser.add_argument("--export", action="store_true", help=f"write the snapshot from {DB_NAME} first")
+    parser.add_argument("--start-date", default=None)
+    args = parser.parse_args()
+
+    if args.export:
+        for name, rows in export_snapshot(args.path, start_date=args.start_date).items():
+            print(f"Exported {rows} {name} bars")
+    header = read_header(args.path)
+    print(f"{args.path}: format {header['version']}, created {header['created']}")
+    for name, meta in header["datasets"].items():
+        print(f"  {name}: {len(meta['symbols'])} symbols, {meta['rows']} bars")
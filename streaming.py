@@ -0,0 +1,195 @@
+import codecs
+import json
+from datetime import datetime, timedelta, timezone
+
+import data
+
+#### INCREMENTAL JSON PARSING: ####
+
+# Bytes read from the socket at a time
+CHUNK_SIZE = 64 * 1024
+
+# Consumed text is dropped from the buffer once this much has piled up
+_TRIM_AT = 256 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+class _Reader:
+    """
+    A text buffer over an iterator of byte chunks that only ever holds the unparsed tail.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.done = False
+
+    def fill(self):
+        # Reads one more chunk; returns False once the stream is exhausted
+        if self.done:
+            return False
+        chunk = next(self.chunks, None)
+        if self.pos > _TRIM_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        if chunk is None:
+            self.buf += self.text.decode(b"", final=True)
+            self.done = True
+            return False
+        self.buf += self.text.decode(chunk)
+        return True
+
+    def peek(self):
+        # The next non-whitespace character, or "" at the end of the stream
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        # Decodes one complete JSON value, reading more chunks until it is whole. A value
+        # that ends exactly at the buffer's end may be a cut-off number, so that waits too.
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.done:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            self.fill()
+
+def iter_json_members(chunks, key):
+    """
+    Streams the members of one top-level field of a JSON object.
+
+    Parameters:
+    chunks (iterable): Byte chunks of the document, e.g. response.iter_content().
+    key (str): The top-level field holding an object or an array.
+
+    What the code does:
+    - Walks the outer object field by field, decoding and discarding the fields before `key`.
+    - Inside `key`, decodes one member at a time with json.JSONDecoder.raw_decode, so only
+      the current member and the unread part of the current chunk are held in memory.
+    - Stops reading as soon as the container closes; the rest of the document is never parsed.
+
+    Returns:
+    generator: (name, value) pairs for an object, or the items of an array.
+
+    Raises:
+    KeyError: If the document has no such field. The other top-level fields are attached as
+        the exception's second argument so callers can report API error messages.
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    skipped = {}
+    while reader.peek() not in ("}", ""):
+        name = reader.value()
+        reader.expect(":")
+        if name != key:
+            skipped[name] = reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+            continue
+
+        opener = reader.peek()
+        if opener not in ("{", "["):
+            raise ValueError(f"Field {key!r} is not an object or array")
+        closer = "}" if opener == "{" else "]"
+        reader.pos += 1
+        while reader.peek() != closer:
+            if opener == "{":
+                member = reader.value()
+                reader.expect(":")
+                yield member, reader.value()
+            else:
+                yield reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+        return
+    raise KeyError(key, skipped)
+
+#### BAR RECORDS: ####
+
+# Every stream yields (date, open, high, low, close, volume) tuples, the row shape db_insert writes
+
+def alpha_vantage_records(chunks, key="Weekly Time Series"):
+    """
+    Streams bars from an Alpha Vantage time series response, newest first as the API sends them.
+    """
+    for day, bar in iter_json_members(chunks, key):
+        yield (day, float(bar["1. open"]), float(bar["2. high"]), float(bar["3. low"]),
+               float(bar["4. close"]), float(bar["5. volume"]))
+
+def polygon_records(chunks):
+    """
+    Streams bars from a Polygon.io aggregates response, oldest first.
+    """
+    for bar in iter_json_members(chunks, "results"):
+        day = datetime.fromtimestamp(bar["t"] / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        yield (day, float(bar["o"]), float(bar["h"]), float(bar["l"]), float(bar["c"]), float(bar["v"]))
+
+def financialdatasets_records(chunks):
+    """
+    Streams bars from a FinancialDatasets.ai prices response, oldest first.
+    """
+    for bar in iter_json_members(chunks, "prices"):
+        yield (bar["time"][:10], float(bar["open"]), float(bar["high"]), float(bar["low"]),
+               float(bar["close"]), float(bar["volume"]))
+
+RECORD_STREAMS = {
+    "alpha_vantage": alpha_vantage_records,
+    "polygon": polygon_records,
+    "financialdatasets": financialdatasets_records,
+}
+
+def week_ending_record(record):
+    """
+    Re-dates a bar to the Friday ending its week, like normalize.week_ending does for frames.
+    """
+    day = datetime.strptime(record[0], '%Y-%m-%d')
+    friday = day + timedelta(days=(4 - day.weekday()) % 7)
+    return (friday.strftime('%Y-%m-%d'),) + tuple(record[1:])
+
+def stream_records(provider, symbol, start_date=None, end_date=None, interval="day"):
+    """
+    Downloads one provider response and yields its bars while the body is still arriving.
+
+    Parameters:
+    provider (str): A key of RECORD_STREAMS.
+    symbol (str): The stock ticker symbol.
+    start_date (str, optional): Start date in "YYYY-MM-DD" format, for the ranged providers.
+    end_date (str, optional): End date in "YYYY-MM-DD" format, for the ranged providers.
+    interval (str, optional): "day" or "week" for the ranged providers.
+
+    What the code does:
+    - Sends the same request as the provider's fetcher through its pooled, rate-limited session,
+      but with stream=True so the body is read in CHUNK_SIZE pieces.
+    - Parses bars out of the chunks as they arrive with the provider's record stream.
+    - Closes the connection when the caller stops iterating, so breaking out early skips
+      the rest of the download. The response cache is bypassed.
+
+    Returns:
+    generator: (date, open, high, low, close, volume) tuples.
+    """
+    records = RECORD_STREAMS[provider]
+    url, params, headers = data.provider_request(provider, symbol, start_date, end_date, interval)
+    response = data.stream_get(provider, url, params=params, headers=headers)
+    try:
+        yield from records(response.iter_content(chunk_size=CHUNK_SIZE))
+    finally:
+        response.close()